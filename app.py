@@ -1,41 +1,163 @@
 import streamlit as st
 import cv2
 import numpy as np
+import pandas as pd
+import os
 import uuid
 import time
-import os
-from collections import deque
-
-# Realtime video streaming
-from streamlit_webrtc import webrtc_streamer, VideoTransformerBase, WebRtcMode
+import queue
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # Project modules
+import auth
+import metrics
 import tidb as db
-from model import load_sign_model, preprocess_image
+from model import LABELS, FrameChangeGate, FramePreprocessor, load_inference_backend
+from inference_worker import BatchInferenceWorker
+from inference_client import INFERENCE_SERVICE_URL, RECONNECT_SECONDS, InferenceServiceClient
+from stabilizer import LetterStabilizer
+from decoding import SUGGESTIONS, WordDecoder, load_lexicon
+from hand_tracking import HAND_LOST_FRAMES, HandTracker
+from landmarks import LandmarkExtractor, load_landmark_classifier
 from utils import speak_text, listen_voice
+from avatars import AvatarLibrary
+from speech import load_recognizer
+from temporal import StreamingTemporalClassifier, load_embedding_backend, load_temporal_head
+
+# Leveled logging for the project modules; LOG_LEVEL=DEBUG shows every database write
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
 # Page configuration and Initialization
 st.set_page_config(layout="wide", page_title="AI Sign Language Interpreter", page_icon="🧏‍♂️")
 st.title("🧏‍♂️ AI Sign Language Interpreter")
 
 # Load model and connect to Database
-@st.cache_resource
+def _load_model():
+    if INFERENCE_SERVICE_URL:
+        # Inference runs in the separate service; this process never loads the model
+        return None
+    backend = load_inference_backend()
+    # One worker batches frames from every webrtc session into a single forward pass
+    return BatchInferenceWorker(backend) if backend else None
 
+def _connect_database():
+    db_pool = db.get_connection_pool()
+    if not db_pool:
+        return None, None
+    with db.pooled_connection() as connection:
+        if connection:
+            db.setup_database(connection)
+    # Prediction logs are written in batches from a background thread
+    log_writer = db.PredictionLogWriter()
+    return db_pool, log_writer
+
+@st.cache_resource
 def initialize_system():
-    """Load model and connect to DB. Caching prevents re-loading on every rerun."""
-    model = load_sign_model('sign_model.h5')
-    connection = db.get_db_connection()
-    if connection:
-        db.setup_database(connection)
-    return model, connection
-
-model, db_connection = initialize_system()
-label_mapping = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-
-if not db_connection:
-    st.error("Could not connect to TiDB.")
-    st.stop()
-    
+    """
+    Starts loading the model and connecting to the DB in parallel background threads,
+    so the first page renders without waiting for either. Caching prevents re-loading on every rerun.
+    """
+    # Frame rate, latency and queue depth metrics for capacity planning
+    metrics.start_metrics_server()
+    executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="startup")
+    return {
+        "model": executor.submit(_load_model),
+        "database": executor.submit(_connect_database),
+        # Decodes every avatar GIF once for the Voice to Sign mode
+        "avatars": executor.submit(AvatarLibrary),
+    }
+
+system = initialize_system()
+label_mapping = LABELS
+
+def require_database():
+    """Waits for the database connection, stopping the page if it could not be made."""
+    if not system["database"].done():
+        with st.spinner("Connecting to the database..."):
+            system["database"].result()
+    db_pool, log_writer = system["database"].result()
+    if not db_pool:
+        st.error("Could not connect to TiDB.")
+        st.stop()
+    return log_writer
+
+def require_model():
+    """Waits for the model to load, stopping the page if it could not be loaded."""
+    if not system["model"].done():
+        with st.spinner("Loading the sign language model..."):
+            system["model"].exception()
+    if system["model"].exception():
+        # The model file does not fit the preprocessing pipeline
+        st.error(f"Could not load the sign language model: {system['model'].exception()}")
+        st.stop()
+    inference_worker = system["model"].result()
+    if not inference_worker:
+        st.error("Could not load the sign language model.")
+        st.stop()
+    return inference_worker
+
+@st.cache_resource
+def load_temporal_system():
+    """Loads the embedding extractor and temporal head once, the first time the temporal mode is used."""
+    head = load_temporal_head()
+    backend = load_embedding_backend() if head else None
+    if not backend:
+        return None, None
+    return BatchInferenceWorker(backend), head
+
+@st.cache_resource
+def load_decoder_lexicon():
+    """Loads the word decoder's lexicon trie once and shares it across sessions."""
+    return load_lexicon()
+
+@st.cache_resource
+def load_landmark_system():
+    """Loads the landmark classifier once, the first time the landmark mode is used."""
+    return load_landmark_classifier()
+
+@st.cache_resource(show_spinner="Loading the speech recognition model...")
+def load_speech_recognizer():
+    """Loads the speech recognizer once, the first time Voice to Sign is used, and shares it across sessions."""
+    return load_recognizer()
+
+@st.cache_resource
+def auth_executor():
+    """Runs sign ins and sign ups off the script thread; bcrypt itself is bounded by BCRYPT_WORKERS."""
+    return ThreadPoolExecutor(max_workers=auth.BCRYPT_WORKERS * 2, thread_name_prefix="auth")
+
+def background_result(key, message):
+    """
+    Returns the result of the auth call stored in `st.session_state[key]` once it has finished.
+    Until then the page shows `message` and reruns shortly, instead of waiting on bcrypt.
+    """
+    future = st.session_state[key]
+    if not future.done():
+        st.info(message)
+        time.sleep(0.1)
+        st.rerun()
+    del st.session_state[key]
+    return future.result()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def refresh_analytics():
+    """Folds new logs into the rollup tables, at most once a minute across all sessions."""
+    return db.refresh_rollups()
+
+def _status(future):
+    if not future.done():
+        return "⏳ starting"
+    if future.exception():
+        return "❌ unavailable"
+    result = future.result()
+    ready = result[0] if isinstance(result, tuple) else result
+    return "✅ ready" if ready else "❌ unavailable"
+
+# Readiness indicator
+model_status = f"🌐 {INFERENCE_SERVICE_URL}" if INFERENCE_SERVICE_URL else _status(system['model'])
+st.sidebar.caption(f"Model: {model_status} · Database: {_status(system['database'])}")
+
 # Session State Management
 # For user authentication
 if 'user_info' not in st.session_state:
@@ -48,11 +170,9 @@ if 'translated_sentence' not in st.session_state:
     st.session_state.translated_sentence = ""
 if 'last_log_id' not in st.session_state:
     st.session_state.last_log_id = None
-if 'prediction_buffer' not in st.session_state:
-    st.session_state.prediction_buffer = deque(maxlen=5) # To stabilize predictions
     
 # User authentication and navigation
-menu = ["Sign In", "Sign Up"] if not st.session_state.user_info else ["Interpreter", "Sign Out"]
+menu = ["Sign In", "Sign Up"] if not st.session_state.user_info else ["Interpreter", "Analytics", "Sign Out"]
 choice = st.sidebar.selectbox("Menu", menu)
 
 st.sidebar.title("User Account")
@@ -66,10 +186,13 @@ if choice == "Sign Up":
         gender = st.selectbox("Gender (for avatar)", ["female", "male"])
         submitted = st.form_submit_button("Sign Up")
         if submitted:
-            if db.register_user(db_connection, new_user, new_pass, gender):
-                st.success("Account created successfully! Please Sign In.")
-            else:
-                st.error("Username already exists.")
+            require_database()
+            st.session_state.pending_signup = auth_executor().submit(db.register_user, new_user, new_pass, gender)
+    if 'pending_signup' in st.session_state:
+        if background_result('pending_signup', "Creating your account..."):
+            st.success("Account created successfully! Please Sign In.")
+        else:
+            st.error("Username already exists.")
                 
 # Sign In page
 elif choice == "Sign In":
@@ -79,13 +202,55 @@ elif choice == "Sign In":
         password = st.text_input("Password", type='password')
         submitted = st.form_submit_button("Login")
         if submitted:
-            user_data = db.login_user(db_connection, username, password)
-            if user_data:
-                st.session_state.user_info = user_data
-                st.rerun()
-            else:
-                st.error("Invalid username or password")
+            require_database()
+            st.session_state.pending_login = auth_executor().submit(db.login_user, username, password)
+    if 'pending_login' in st.session_state:
+        # The login survives reruns in the session state, so bcrypt runs once per sign in
+        user_data = background_result('pending_login', "Signing in...")
+        if user_data:
+            st.session_state.user_info = user_data
+            st.rerun()
+        else:
+            st.error("Invalid username or password")
                 
+# Analytics dashboard, read from the precomputed rollup tables
+elif choice == "Analytics" and st.session_state.user_info:
+    require_database()
+    st.subheader("Your Analytics")
+    with st.spinner("Updating analytics..."):
+        refresh_analytics()
+    user_id = st.session_state.user_info['user_id']
+
+    accuracy = pd.DataFrame(db.get_letter_accuracy(user_id))
+    if accuracy.empty:
+        st.info("No predictions logged yet. Use the interpreter to see your analytics here.")
+    else:
+        col_accuracy, col_confidence = st.columns(2)
+        with col_accuracy:
+            st.markdown("**Accuracy per letter** (from your corrections)")
+            st.bar_chart(accuracy.set_index('letter')['accuracy'].astype(float))
+        with col_confidence:
+            st.markdown("**Confidence distribution**")
+            confidence = pd.DataFrame(db.get_confidence_distribution(user_id))
+            if confidence.empty:
+                # The rollups may not have caught up with the latest predictions yet
+                st.info("No confidence data yet. Check back in a minute.")
+            else:
+                confidence['confidence'] = confidence['bucket'].map(lambda b: f"{b / 10:.1f}-{(b + 1) / 10:.1f}")
+                st.bar_chart(confidence.set_index('confidence')['predictions'])
+
+        st.markdown("**Recent sessions**")
+        sessions = pd.DataFrame(db.get_session_throughput(user_id))
+        st.dataframe(sessions, hide_index=True, use_container_width=True)
+
+        st.markdown("**Most confused letters**")
+        pairs = pd.DataFrame(db.get_confused_pairs(user_id))
+        if pairs.empty:
+            st.caption("No corrections submitted yet.")
+        else:
+            st.dataframe(pairs.rename(columns={'predicted_sign': 'Predicted', 'correct_sign': 'Actually', 'occurrences': 'Times'}),
+                         hide_index=True, use_container_width=True)
+
 # Sign Out logic
 elif choice == "Sign Out":
     st.session_state.user_info = None
@@ -100,26 +265,261 @@ elif choice == "Interpreter" and st.session_state.user_info:
     
     # SIGN TO VOICE (Realtime)
     if action == "Sign to Voice":
+        # Realtime video streaming, imported only when the interpreter is opened
+        from streamlit_webrtc import webrtc_streamer, VideoTransformerBase, WebRtcMode
+
+        log_writer = require_database()
+        recognition_mode = st.selectbox("Recognition Mode", ["Single frame", "Temporal (motion letters)", "Landmarks (fast)"])
+        word_decoding = st.checkbox("Word decoding with suggestions", value=True,
+                                    help="Decode whole words against a dictionary, allowing double letters and autocompletion")
+        lexicon = load_decoder_lexicon() if word_decoding else None
+        temporal_head = None
+        landmark_classifier = None
+        remote_inference = False
+        inference_worker = None
+        if recognition_mode == "Landmarks (fast)":
+            # Hand keypoints are classified in the video thread; MediaPipe also locates the hand
+            landmark_classifier = load_landmark_system()
+            if not landmark_classifier:
+                st.error("The landmark model is not available. Install `mediapipe` and train it with `python train_landmark_model.py`.")
+                st.stop()
+            track_hand = False
+            model_version = landmark_classifier.version
+        else:
+            track_hand = st.checkbox("Track hand position", value=False,
+                                     help="Follow the hand around the frame instead of using the fixed green box")
+            if recognition_mode == "Single frame" and INFERENCE_SERVICE_URL:
+                # Frames go to the inference service, which reports its model version with every letter
+                remote_inference = True
+            elif recognition_mode == "Single frame":
+                inference_worker = require_model()
+            else:
+                # The model produces embeddings that feed the streaming sequence head
+                inference_worker, temporal_head = load_temporal_system()
+                if not inference_worker:
+                    st.error("The temporal model is not available. Train it with `python train_temporal.py`.")
+                    st.stop()
+            # Logged with every prediction so the logs record which model actually ran
+            model_version = inference_worker.backend.version if inference_worker else None
+        # Frames are preprocessed to the model's own input size; the landmark and remote modes only crop for display and logging
+        target_size = inference_worker.backend.target_size if inference_worker else (64, 64)
+
         # Real-time video processing class
         class SignVideoTransformer(VideoTransformerBase):
+            def __init__(self):
+                # Owns preallocated buffers so preprocessing does not allocate per frame
+                self.preprocessor = FramePreprocessor(target_size=target_size)
+                # Finds the hand box at a low rate and tracks it in between; None uses the fixed centre box
+                self.hand_tracker = HandTracker() if track_hand and not remote_inference else None
+                # Connection to the inference service when this app is a thin client, retried while it is down
+                self.remote = None
+                self.remote_error = None
+                self._next_connect = 0.0
+                if remote_inference:
+                    self._connect_remote()
+                # Keypoint extractor in landmark mode; it locates the hand as well
+                self.landmark_extractor = LandmarkExtractor() if landmark_classifier else None
+                self.frames_without_hand = 0
+                # Reuses the last prediction while the hand in the ROI is not moving
+                self.gate = FrameChangeGate()
+                # Streaming sequence head, updated once per frame in temporal mode
+                self.temporal = StreamingTemporalClassifier(temporal_head) if temporal_head else None
+                # Majority vote over recent frames, only accepting high-confidence predictions.
+                # The temporal head already smooths over time, so it needs a shorter vote.
+                self.stabilizer = LetterStabilizer(window=2 if self.temporal else 5, confidence_threshold=0.90)
+                # Beam search over the per-frame probabilities; the UI thread also commits words
+                self.decoder = WordDecoder(lexicon) if lexicon else None
+                self.decoder_lock = threading.Lock()
+                # Last word-in-progress and suggestions sent to the UI thread
+                self.decoded = ("", [])
+                # Accepted letters, decoded words and decoder updates are handed from the video thread to the UI thread
+                self.letter_events = queue.Queue(maxsize=32)
+                # Per-mode metrics, looked up once instead of on every frame
+                self.frames_metric = metrics.FRAMES.labels(recognition_mode)
+                self.inference_metric = metrics.INFERENCE_SECONDS.labels(recognition_mode)
+                self.streams_metric = metrics.ACTIVE_STREAMS.labels(recognition_mode)
+                self.streams_metric.inc()
+
+            def on_ended(self):
+                self.streams_metric.dec()
+                if self.remote:
+                    self.remote.close()
+                if self.landmark_extractor:
+                    # Releases the MediaPipe graph and its native threads
+                    self.landmark_extractor.close()
+
+            def wait_for_letter(self, timeout=1.0):
+                """Blocks until the next letter, word or decoder update, returning None after `timeout` seconds."""
+                try:
+                    return self.letter_events.get(timeout=timeout)
+                except queue.Empty:
+                    return None
+
+            def decoding_state(self):
+                """Returns the word in progress and its suggested completions."""
+                with self.decoder_lock:
+                    return self.decoder.prefix, self.decoder.suggestions()
+
+            def end_word(self, suggestion=None):
+                """Commits the word in progress, or the suggestion at the given index, returning it."""
+                with self.decoder_lock:
+                    if suggestion is None:
+                        word = self.decoder.end_word()
+                    else:
+                        word = self.decoder.accept_suggestion(suggestion)
+                self._publish_decoding()
+                return word
+
+            def _step_decoder(self, probabilities=None):
+                # A frame without a hand advances the beam search with a blank
+                with self.decoder_lock:
+                    if probabilities is None:
+                        self.decoder.step_blank()
+                    else:
+                        self.decoder.step(probabilities)
+                self._publish_decoding()
+
+            def _publish_decoding(self):
+                # The UI thread only wakes up when the decoded text actually changes
+                decoded = self.decoding_state()
+                if decoded != self.decoded:
+                    self.decoded = decoded
+                    self._publish({"decoding": decoded})
+
+            def _publish_letter(self, sign, confidence, roi_crop):
+                self._publish({"sign": sign, "confidence": confidence, "roi_crop": roi_crop})
+
+            def _publish(self, event):
+                # Never block the video thread: drop the oldest event if the UI falls behind
+                while True:
+                    try:
+                        self.letter_events.put_nowait(event)
+                        return
+                    except queue.Full:
+                        try:
+                            self.letter_events.get_nowait()
+                        except queue.Empty:
+                            pass
+
+            def _no_hand(self, img):
+                # No hand: skip classification, and start the letter over if the hand stays away
+                self.frames_without_hand += 1
+                if self.decoder:
+                    self._step_decoder()
+                if self.frames_without_hand == HAND_LOST_FRAMES:
+                    self.stabilizer.reset()
+                    if self.temporal:
+                        self.temporal.reset()
+                    # Lowering the hand ends the word
+                    if self.decoder:
+                        word = self.end_word()
+                        if word:
+                            self._publish({"word": word})
+                metrics.FRAMES_SKIPPED.labels("no_hand").inc()
+                cv2.putText(img, "No hand detected", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
+                return img
+
+            def _connect_remote(self):
+                try:
+                    self.remote = InferenceServiceClient(INFERENCE_SERVICE_URL, track_hand=track_hand)
+                    self.remote_error = None
+                except Exception as e:
+                    self._remote_failed(e)
+
+            def _remote_failed(self, error):
+                # A failed or timed-out exchange leaves the connection out of step; reconnect later
+                if self.remote:
+                    try:
+                        self.remote.close()
+                    except Exception:
+                        pass
+                self.remote = None
+                self.remote_error = f"Inference service unavailable: {error}"
+                self._next_connect = time.monotonic() + RECONNECT_SECONDS
+                print(self.remote_error)
+
+            def _recv_remote(self, img):
+                # Thin client: the inference service tracks the hand, classifies the frame and runs the vote
+                if self.remote is None and time.monotonic() >= self._next_connect:
+                    self._connect_remote()
+                if self.remote is None:
+                    metrics.FRAMES_SKIPPED.labels("service_unavailable").inc()
+                    cv2.putText(img, "Inference service unavailable, retrying", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
+                    return img
+                try:
+                    with self.inference_metric.time():
+                        result = self.remote.process(img)
+                except Exception as e:
+                    self._remote_failed(e)
+                    return img
+                if "error" in result:
+                    return img
+                if not result["hand"]:
+                    return self._no_hand(img)
+                self.frames_without_hand = 0
+
+                x1, y1, x2, y2 = result["box"]
+                cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                if self.decoder:
+                    with metrics.STABILIZE_SECONDS.time():
+                        self._step_decoder(result["probabilities"])
+                letter = result.get("letter")
+                if letter:
+                    metrics.LETTERS_ACCEPTED.inc()
+                    self._publish({**letter, "model_version": result["model_version"]})
+                cv2.putText(img, f"{result['sign']} ({result['confidence']:.2f})", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
+                return img
+
             def recv(self, frame):
                 img = frame.to_ndarray(format="bgr24")
+                self.frames_metric.inc()
+                if remote_inference:
+                    return self._recv_remote(img)
+
+                box = None
+                features = None
+                if self.landmark_extractor:
+                    features, box = self.landmark_extractor(img)
+                elif self.hand_tracker:
+                    box = self.hand_tracker.update(img)
+                if self.landmark_extractor or self.hand_tracker:
+                    if box is None:
+                        return self._no_hand(img)
+                    self.frames_without_hand = 0
                 
-                # Preprocessing frame for the model
-                processed_img, display_img = preprocess_image(img, target_size=(64, 64))
+                # Preprocessing frame for the model, drawing the ROI box on the frame itself
+                with metrics.PREPROCESS_SECONDS.time():
+                    processed_img, display_img = self.preprocessor(img, box=box)
                 
-                # Perform inference
-                prediction = model.predict(processed_img)
-                predicted_index = np.argmax(prediction)
+                # Perform inference through the shared batching worker, unless the frame is unchanged
+                if features is not None:
+                    # The keypoint classifier is cheap enough to run on every frame, in this thread
+                    with self.inference_metric.time():
+                        output = landmark_classifier.predict(features)
+                elif self.gate.should_infer(processed_img):
+                    with self.inference_metric.time():
+                        output = inference_worker.predict(processed_img)
+                    if output is None:
+                        return display_img
+                    self.gate.update(processed_img, output)
+                else:
+                    metrics.FRAMES_SKIPPED.labels("unchanged").inc()
+                    output = self.gate.last_prediction
+                # Unchanged frames still advance the temporal window with their reused embedding
+                prediction = self.temporal.update(output) if self.temporal else output
+                predicted_index = int(np.argmax(prediction))
                 predicted_sign = label_mapping[predicted_index]
                 confidence = float(np.max(prediction))
                 
-                # Stores prediction in session state and pass data to the main thread
-                st.session_state.current_prediction_data = {
-                    "sign": predicted_sign,
-                    "confidence": confidence
-                }
-                st.session_state.prediction_buffer.append(predicted_sign)
+                # Passes stable letters to the UI thread
+                with metrics.STABILIZE_SECONDS.time():
+                    if self.decoder:
+                        self._step_decoder(prediction)
+                    accepted_sign = self.stabilizer.update(predicted_sign, confidence)
+                if accepted_sign:
+                    metrics.LETTERS_ACCEPTED.inc()
+                    # The crop the model saw is logged with the letter so corrections can be retrained on
+                    self._publish_letter(accepted_sign, confidence, self.preprocessor.resized.tobytes())
                 
                 # Draw prediction on the frame for visual feedback
                 cv2.putText(display_img, f"{predicted_sign} ({confidence:.2f})", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
@@ -130,8 +530,8 @@ elif choice == "Interpreter" and st.session_state.user_info:
             
         with col_video:
             st.header("Live Feed")
-            webrtc_streamer(
-                key="sign-interpreter-stream",
+            webrtc_ctx = webrtc_streamer(
+                key=f"sign-interpreter-stream-{recognition_mode}-{track_hand}-{word_decoding}",
                 mode=WebRtcMode.SENDRECV,
                 video_processor_factory=SignVideoTransformer,
                 media_stream_constraints={"video": True, "audio": False},
@@ -141,6 +541,14 @@ elif choice == "Interpreter" and st.session_state.user_info:
             st.header("Translated Sentence")
             sentence_placeholder = st.empty()
             sentence_placeholder.markdown(f"## `{st.session_state.translated_sentence}`")
+            if word_decoding:
+                st.header("Suggestions")
+                suggestions_placeholder = st.empty()
+                suggestion_buttons = st.columns(SUGGESTIONS + 1)
+                accepted = [suggestion_buttons[i].button(f"Accept {i + 1}", key=f"accept-suggestion-{i}")
+                            for i in range(SUGGESTIONS)]
+                accept_index = accepted.index(True) if any(accepted) else None
+                end_word_clicked = suggestion_buttons[SUGGESTIONS].button("End word", key="end-word")
             st.header("Prediction Details")
             details_placeholder = st.empty()
                 
@@ -149,75 +557,112 @@ elif choice == "Interpreter" and st.session_state.user_info:
         correct_sign_input = st.sidebar.text_input("If the last letter was wrong correct it here:", max_chars=1).upper()
         if st.sidebar.button("Submit Correction"):
             if st.session_state.last_log_id and correct_sign_input:
-                db.log_feedback(db.connection, st.session_state.last_log_id, correct_sign_input)
-                st.sidebar.success(f"Feedback submitted.")
+                # The logged prediction must be written before feedback can reference it
+                if not log_writer.flush():
+                    st.sidebar.error("The prediction could not be saved, so the correction was not submitted.")
+                elif not db.log_feedback(st.session_state.last_log_id, correct_sign_input):
+                    st.sidebar.error("The correction could not be saved. Please try again.")
+                else:
+                    st.sidebar.success(f"Feedback submitted.")
             else:
                 st.sidebar.warning("A prediction must be logged first")
-                    
+
+        def show_decoding(prefix, suggestions):
+            sentence_placeholder.markdown(f"## `{st.session_state.translated_sentence}{prefix}`")
+            suggestions_placeholder.markdown("  ".join(f"**{i + 1}.** {word}" for i, word in enumerate(suggestions)) or "—")
+
+        def commit_word(word):
+            st.session_state.translated_sentence += word + " "
+            sentence_placeholder.markdown(f"## `{st.session_state.translated_sentence}`")
+            speak_text(word)
+
+        # Suggestion buttons rerun the script, so they are handled before the event loop restarts
+        if word_decoding and webrtc_ctx.video_processor and (accept_index is not None or end_word_clicked):
+            word = webrtc_ctx.video_processor.end_word(accept_index)
+            if word:
+                commit_word(word)
+
+        # Event loop: waits on the video processor for accepted letters while the stream is live
+        shown_processor = None
+        shown_error = None
+        while webrtc_ctx.state.playing:
+            processor = webrtc_ctx.video_processor
+            if processor is None:
+                # The processor is created shortly after the stream starts
+                time.sleep(0.05)
+                continue
+            if word_decoding and processor is not shown_processor:
+                # A rerun starts from the word in progress; later changes arrive as events
+                show_decoding(*processor.decoding_state())
+                shown_processor = processor
+            if remote_inference and processor.remote_error != shown_error:
+                shown_error = processor.remote_error
+                if shown_error:
+                    details_placeholder.warning(f"{shown_error}. Retrying every {RECONNECT_SECONDS:.0f} s.")
+            data = processor.wait_for_letter(timeout=1.0)
+            if data is None:
+                continue
+            if "decoding" in data:
+                show_decoding(*data["decoding"])
+                continue
+            if "word" in data:
+                commit_word(data["word"])
+                continue
+            stable_sign = data['sign']
+
+            # Update the sentence and UI
+            details_placeholder.info(f"**Current Sign:**{stable_sign}\n\n" f"**Confidence:**{data['confidence']:.2f}")
+            if not word_decoding:
+                st.session_state.translated_sentence += stable_sign
+                sentence_placeholder.markdown(f"## `{st.session_state.translated_sentence}`")
+
+                # Speak the new letter; letters signed in quick succession are spoken as one word
+                speak_text(stable_sign)
+
+            # Log to TiDB
+            current_user_id = st.session_state.user_info['user_id']
+            log_id = log_writer.log_prediction(
+                session_id=st.session_state.session_id,
+                prediction=stable_sign,
+                confidence=data['confidence'],
+                user_id=current_user_id,
+                model_version=data.get('model_version', model_version),
+                roi_crop=data['roi_crop']
+            )
+            st.session_state.last_log_id = log_id
+
     elif action == "Voice to Sign":
         st.header("Speak a word or sentence")
-        if st.button("Start Listening", type="primary"):
-            with st.pinner("Listening...0"):
-                sentence = listen_voice()
-                
-            if sentence:
-                st.success(f"You said: \"{sentence}\"")
-                st.info("Displaying sign language avatar...")
-                
-                user_gender = st.session_state.user_info.get('gender', 'female')
-                
-                for char in sentence.upper():
-                    if char.isalpha():
-                        gif_path = f"avatars/{user_gender}/{char.lower()}.gif"
-                        if os.path.exists(gif_path):
-                            st.image(gif_path, caption=f"Sign for '{char}'", width=250)
-                            time.sleep(1) # Pause between signs
-                            
-                        else:
-                            st.warning(f"No avatar found for '{char}'")
-                    elif char.isspace():
-                        time.sleep(1) # Pause for spaces
+        audio_file = st.file_uploader("Or transcribe a recording (16-bit mono WAV)", type=["wav"])
+        listen = st.button("Start Listening", type="primary")
+        if listen or audio_file is not None:
+            recognizer = load_speech_recognizer()
+            avatar_library = system["avatars"].result()
+            user_gender = st.session_state.user_info.get('gender', 'female')
+            transcript_placeholder = st.empty()
+            avatar_columns = st.columns(4)
+
+            # Each word is signed as soon as the recognizer stops revising it, while the user is still speaking
+            phrases = []
+            signed_words = 0
+            shown = 0
+            for text, is_final in listen_voice(recognizer, None if listen else audio_file):
+                words = text.split()
+                transcript_placeholder.markdown(f"You said: \"{' '.join(phrases + [text])}\"")
+                stable_words = words if is_final else words[:-1]
+                for word in stable_words[signed_words:]:
+                    animation, missing = avatar_library.render(user_gender, word)
+                    for char in dict.fromkeys(missing):
+                        st.warning(f"No avatar found for '{char}'")
+                    if animation:
+                        avatar_columns[shown % len(avatar_columns)].image(animation, caption=f"Signing: \"{word}\"", width=250)
+                        shown += 1
+                signed_words = max(signed_words, len(stable_words))
+                if is_final:
+                    phrases.append(text)
+                    signed_words = 0
+
+            if phrases:
+                st.success(f"You said: \"{' '.join(phrases)}\"")
             else:
                 st.error("Could not understand the audio. Please try again")
-                
-# Main application loop (for updating UI from session state)
-if st.session_state.user_info and choice == "Interpreter" and action == "Sign to Voice":
-    confidence_threshold = 0.90 # Only accept high-confidence predictions
-    details_placeholder = st.empty()
-    sentence_placeholder = st.empty()
-    while True:
-        if "current_prediction_data" in st.session_state:
-            data = st.session_state.current_prediction_data
-            
-            # Update the details placeholder
-            details_placeholder.info(f"**Current Sign:**{data['sign']}\n\n" f"**Confidence:**{data['confidence']:.2f}")
-            
-            # Checks for a stable prediction for the buffer
-            if len(st.session_state.prediction_buffer) == st.session_state.prediction_buffer.maxlen:
-                stable_sign = max(set(st.session_state.prediction_buffer), key=st.session_state.prediction_buffer.count)
-                
-                # Checks if this stable sign is new and confident
-                if stable_sign != st.session_state.get('last_spoken_sign') and data['confidence'] > confidence_threshold:
-                    # Update the sentence and UI
-                    st.session_state.translated_sentence += stable_sign
-                    sentence_placeholder.markdown(f"## `st.session_state.translated_sentence`")
-                    
-                    # Speak the new letter
-                    speak_text(stable_sign)
-                    st.session_state.last_spoken_sign = stable_sign # To prevent re-speaking
-                    
-                    # Log to TiDB
-                    current_user_id = st.session_state.user_info['user_id']
-                    log_id = db.log_prediction(
-                        connection=db_connection,
-                        session_id=st.session_state.session_id,
-                        prediction=stable_sign,
-                        confidence=data['confidence'],
-                        user_id=current_user_id
-                    )
-                    st.session_state.last_log_id = log_id
-                    
-                    # Clears buffer after successful action
-                    st.session_state.prediction_buffer.clear()
-                    
-        time.sleep(0.1)
\ No newline at end of file
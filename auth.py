@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# bcrypt work factor for new hashes. Existing hashes with a different cost are
+# rehashed transparently on the user's next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Maximum number of bcrypt computations running at once
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", 4))
+
+# bcrypt releases the GIL, so a small pool bounds how many hashes run at once during
+# login bursts while other threads keep running. It only limits concurrency: the
+# calling thread still waits for its own hash, so the app calls these from a
+# background thread rather than the Streamlit script thread.
+_bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
+# Password hashing
+def hash_password(password):
+    """
+    Hashes a password with the configured work factor on the bcrypt pool.
+    Blocks the caller for the full bcrypt cost, plus any wait for a free worker.
+    """
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return _bcrypt_pool.submit(bcrypt.hashpw, password.encode('utf-8'), salt).result().decode('utf-8')
+
+def check_password(password, password_hash):
+    """
+    Checks a password against its stored hash on the bcrypt pool.
+    Blocks the caller for the full bcrypt cost, plus any wait for a free worker.
+    """
+    return _bcrypt_pool.submit(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8')).result()
+
+def needs_rehash(password_hash):
+    """True if a stored hash was made with a different work factor than BCRYPT_ROUNDS."""
+    try:
+        # bcrypt hashes look like $2b$12$<salt+hash>
+        return int(password_hash.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,124 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageSequence
+
+AVATAR_DIR = "avatars"
+# Number of composed sentences kept in memory
+SENTENCE_CACHE_SIZE = int(os.getenv("AVATAR_CACHE_SIZE", 128))
+# Minimum time each letter stays on screen, and the pause for a space
+LETTER_DURATION_MS = 1000
+SPACE_DURATION_MS = 1000
+
+def normalize_text(text):
+    """Upper-cases the text and keeps only letters and single spaces, the parts the avatar can sign."""
+    kept = ''.join(char for char in text.upper() if char.isalpha() or char.isspace())
+    return ' '.join(kept.split())
+
+class AvatarLibrary:
+    """
+    In-memory cache of the sign language avatar GIFs.
+    Every letter GIF is decoded once when the library is created. Sentences are
+    composed into a single animated GIF, kept in an LRU cache keyed by
+    (gender, normalized text), so the browser plays the whole sentence without
+    the server sleeping between letters.
+    """
+
+    def __init__(self, avatar_dir=AVATAR_DIR, cache_size=SENTENCE_CACHE_SIZE):
+        self.avatar_dir = avatar_dir
+        self.cache_size = cache_size
+        self.frame_size = None
+        # (gender, letter) -> list of (RGB frame, duration in ms)
+        self._letters = {}
+        self._sentences = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.isdir(self.avatar_dir):
+            print(f"Avatar directory '{self.avatar_dir}' not found.")
+            return
+        for gender in sorted(os.listdir(self.avatar_dir)):
+            for letter in "abcdefghijklmnopqrstuvwxyz":
+                path = os.path.join(self.avatar_dir, gender, f"{letter}.gif")
+                if not os.path.exists(path):
+                    continue
+                try:
+                    self._letters[(gender, letter.upper())] = self._decode(path, letter.upper())
+                except Exception as e:
+                    print(f"Error loading avatar {path}: {e}")
+        print(f"Loaded {len(self._letters)} avatar animations.")
+
+    def _decode(self, path, letter):
+        """Decodes a letter GIF into captioned RGB frames of a common size."""
+        frames = []
+        with Image.open(path) as gif:
+            for frame in ImageSequence.Iterator(gif):
+                image = frame.convert('RGB')
+                if self.frame_size is None:
+                    self.frame_size = image.size
+                elif image.size != self.frame_size:
+                    image = image.resize(self.frame_size)
+                ImageDraw.Draw(image).text((10, 10), f"Sign for '{letter}'", fill=(0, 0, 0))
+                frames.append((image, frame.info.get('duration', 100)))
+
+        # Hold the last frame so each letter stays on screen long enough to follow
+        total = sum(duration for _, duration in frames)
+        if total < LETTER_DURATION_MS:
+            image, duration = frames[-1]
+            frames[-1] = (image, duration + LETTER_DURATION_MS - total)
+        return frames
+
+    def render(self, gender, text):
+        """
+        Composes the avatar animation for a sentence.
+        Args:
+            gender (str): Avatar set to use, 'female' or 'male'.
+            text (str): The sentence to sign.
+        Returns:
+            tuple: (gif_bytes, missing) where gif_bytes is the animated GIF, or None if
+                no letter could be signed, and missing lists letters without an avatar.
+        """
+        key = (gender, normalize_text(text))
+        with self._lock:
+            if key in self._sentences:
+                self._sentences.move_to_end(key)
+                return self._sentences[key]
+
+        result = self._compose(*key)
+
+        with self._lock:
+            self._sentences[key] = result
+            self._sentences.move_to_end(key)
+            while len(self._sentences) > self.cache_size:
+                self._sentences.popitem(last=False)
+        return result
+
+    def _compose(self, gender, text):
+        frames = []
+        durations = []
+        missing = []
+        for char in text:
+            if char == ' ':
+                if frames:
+                    # Pause for spaces
+                    frames.append(Image.new('RGB', self.frame_size, (255, 255, 255)))
+                    durations.append(SPACE_DURATION_MS)
+                continue
+            letter_frames = self._letters.get((gender, char))
+            if not letter_frames:
+                missing.append(char)
+                continue
+            for image, duration in letter_frames:
+                frames.append(image)
+                durations.append(duration)
+
+        if not frames:
+            return None, missing
+
+        buffer = io.BytesIO()
+        frames[0].save(buffer, format='GIF', save_all=True, append_images=frames[1:],
+                       duration=durations, loop=0, disposal=2)
+        return buffer.getvalue(), missing
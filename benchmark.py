@@ -0,0 +1,196 @@
+"""
+Latency and throughput benchmark for the sign-to-text path.
+
+Measures preprocessing (as configured in the live app), model inference (Keras .h5 and TFLite) and the letter
+stabilizer on synthetic frames at several resolutions, or on frames from a recording.
+Results are printed as a table and written as JSON so runs from different commits
+can be compared with --compare.
+
+Usage:
+    python benchmark.py -o bench.json
+    python benchmark.py --video recording.mp4 --backends tflite --batch-sizes 1 16
+    python benchmark.py -o new.json --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from model import LABELS, FramePreprocessor, load_inference_backend, preprocess_image
+from stabilizer import LetterStabilizer
+
+RESOLUTIONS = {
+    '480p': (640, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+}
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def synthetic_frames(width, height, count=32, seed=0):
+    """Random BGR frames with the given resolution."""
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+def recorded_frames(path, count=64):
+    """Reads up to `count` frames from a video file or image folder."""
+    from transcribe import iter_frames
+    frames = []
+    for _, _, frame in iter_frames(path):
+        frames.append(frame)
+        if len(frames) >= count:
+            break
+    if not frames:
+        raise IOError(f"No frames could be read from {path}")
+    return frames
+
+def measure(fn, iterations, items_per_call=1, warmup=5):
+    """
+    Times `fn(i)` for `iterations` calls.
+    Returns:
+        dict: Latency percentiles in ms, frames per second and frames per CPU-second.
+    """
+    for i in range(warmup):
+        fn(i)
+    latencies = np.empty(iterations)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        latencies[i] = time.perf_counter() - start
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    frames = iterations * items_per_call
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+    return {
+        'iterations': iterations,
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'fps': round(frames / wall, 1),
+        # CPU time covers every thread, so this is throughput per fully busy core
+        'fps_per_core': round(frames / cpu, 1) if cpu > 0 else None,
+    }
+
+def bench_preprocess(frames_by_source, iterations):
+    results = []
+    for source, frames in frames_by_source.items():
+        # Configured as in the live transformer, which draws the ROI box on the frame in place
+        preprocessor = FramePreprocessor(target_size=(64, 64))
+        stats = measure(lambda i: preprocessor(frames[i % len(frames)]), iterations)
+        results.append({'stage': 'preprocess', 'variant': 'FramePreprocessor', 'source': source, **stats})
+        # Reference only: the allocating function, which also copies the frame for display
+        stats = measure(lambda i: preprocess_image(frames[i % len(frames)]), iterations)
+        results.append({'stage': 'preprocess', 'variant': 'preprocess_image', 'source': source, **stats})
+    return results
+
+def bench_inference(backends, batch_sizes, iterations):
+    results = []
+    rng = np.random.default_rng(0)
+    for name in backends:
+        backend = load_inference_backend(name)
+        if backend is None:
+            print(f"Skipping inference benchmark for '{name}': model could not be loaded.")
+            continue
+        single = rng.random((1,) + tuple(backend.input_shape[1:]), dtype=np.float32)
+        stats = measure(lambda i: backend.predict(single), iterations)
+        results.append({'stage': 'inference', 'variant': name, 'batch_size': 1, 'mode': 'predict', **stats})
+        for batch_size in batch_sizes:
+            batch = rng.random((batch_size,) + tuple(backend.input_shape[1:]), dtype=np.float32)
+            calls = max(1, iterations // batch_size)
+            stats = measure(lambda i: backend.predict_batch(batch), calls, items_per_call=batch_size)
+            results.append({'stage': 'inference', 'variant': name, 'batch_size': batch_size, 'mode': 'predict_batch', **stats})
+    return results
+
+def bench_stabilizer(iterations):
+    rng = np.random.default_rng(0)
+    signs = [LABELS[i] for i in rng.integers(0, len(LABELS), size=iterations)]
+    confidences = rng.random(iterations)
+    stabilizer = LetterStabilizer()
+    stats = measure(lambda i: stabilizer.update(signs[i], confidences[i]), iterations, warmup=0)
+    return [{'stage': 'stabilizer', 'variant': 'LetterStabilizer', **stats}]
+
+def result_key(result):
+    return tuple(str(result.get(field)) for field in ('stage', 'variant', 'source', 'batch_size', 'mode'))
+
+def compare(results, baseline_path):
+    """Prints the p50 latency and throughput change against an earlier run."""
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)['results']}
+    print(f"\nComparison against {baseline_path}:")
+    for result in results:
+        old = baseline.get(result_key(result))
+        if not old:
+            continue
+        latency_change = (result['p50_ms'] / old['p50_ms'] - 1) * 100 if old['p50_ms'] else 0.0
+        fps_change = (result['fps'] / old['fps'] - 1) * 100 if old['fps'] else 0.0
+        label = ' '.join(v for v in result_key(result) if v != 'None')
+        print(f"  {label:<55} p50 {latency_change:+7.1f}%   fps {fps_change:+7.1f}%")
+
+def print_table(results):
+    print(f"\n{'stage':<11}{'variant':<19}{'source/batch':<15}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'fps':>11}{'fps/core':>11}")
+    for r in results:
+        detail = r.get('source') or f"batch={r.get('batch_size', '')}"
+        print(f"{r['stage']:<11}{r['variant']:<19}{detail:<15}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['fps']:>11.1f}{(r['fps_per_core'] or 0):>11.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sign-to-text path.")
+    parser.add_argument('-o', '--output', default='bench_results.json', help="Where to write JSON results")
+    parser.add_argument('--video', default=None, help="Also benchmark preprocessing on frames from this video or folder")
+    parser.add_argument('--resolutions', nargs='+', default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument('--backends', nargs='+', default=['keras', 'tflite'], choices=['keras', 'tflite'])
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--compare', default=None, help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    frames_by_source = {name: synthetic_frames(*RESOLUTIONS[name]) for name in args.resolutions}
+    if args.video:
+        frames_by_source['recorded'] = recorded_frames(args.video)
+
+    results = []
+    results += bench_preprocess(frames_by_source, args.iterations)
+    results += bench_inference(args.backends, args.batch_sizes, args.iterations)
+    results += bench_stabilizer(args.iterations * 10)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'peak_rss_mb': peak_rss_mb(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_table(results)
+    print(f"\nPeak RSS: {report['peak_rss_mb']:.1f} MB" if report['peak_rss_mb'] else "")
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
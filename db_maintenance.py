@@ -0,0 +1,37 @@
+"""
+Database maintenance commands.
+
+Usage:
+    python db_maintenance.py migrate          # create tables and apply pending schema migrations
+    python db_maintenance.py purge            # delete logs older than PREDICTION_LOG_RETENTION_DAYS
+    python db_maintenance.py purge --days 30
+"""
+import argparse
+import logging
+
+import tidb as db
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Sign AI database maintenance.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('migrate', help="Create tables and apply pending schema migrations")
+    purge = subcommands.add_parser('purge', help="Delete prediction logs past the retention period")
+    purge.add_argument('--days', type=int, default=db.PREDICTION_LOG_RETENTION_DAYS,
+                       help="Retention period in days (default: PREDICTION_LOG_RETENTION_DAYS)")
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        with db.pooled_connection() as connection:
+            if not connection:
+                raise SystemExit("Could not connect to TiDB.")
+            db.setup_database(connection)
+    elif args.command == 'purge':
+        if not args.days:
+            print("No retention period set, nothing to purge.")
+            return
+        if db.purge_old_predictions(args.days) is None:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
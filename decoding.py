@@ -0,0 +1,292 @@
+"""
+Lexicon-aware decoding of the per-frame letter probabilities.
+
+Instead of voting on argmax letters, `WordDecoder` runs a CTC-style prefix beam
+search over the probability vectors. Low-confidence and hand-free frames count as
+blanks, so a letter held for many frames collapses to one letter, while the same
+letter signed twice with a pause or bounce in between becomes a double letter.
+Beams are scored with a unigram word model through a lexicon trie: each prefix
+gets the log-probability of its most likely completion, and prefixes outside
+the lexicon pay a per-letter penalty but are kept, so names can still be spelled.
+The most likely completions of the leading prefix are offered as suggestions.
+
+The trie is stored as flat arrays in breadth-first order: the children of a node
+are contiguous, so a child lookup is one `bytes.find` over at most 26 bytes. A
+lexicon can be precomputed from a word list with
+
+    python decoding.py words.txt -o lexicon.npz
+
+where each line holds a word and an optional count.
+"""
+import argparse
+import math
+import os
+from array import array
+from collections import deque
+
+import numpy as np
+
+from model import LABELS
+
+LEXICON_PATH = os.getenv("SIGN_LEXICON_PATH", "lexicon.npz")
+BEAM_WIDTH = int(os.getenv("DECODER_BEAM_WIDTH", 8))
+# Letters considered per frame
+TOP_LETTERS = 4
+# Letters below this probability are never extended
+MIN_LETTER_PROB = 0.01
+# Weight of the word model against the letter probabilities
+LM_WEIGHT = 0.5
+# Log-probability charged per letter outside the lexicon
+OOV_PENALTY = -4.0
+SUGGESTIONS = 3
+
+# Fallback lexicon of common words, most frequent first
+COMMON_WORDS = """
+the be to of and a in that have i it for not on with he as you do at this but his by from they we say her
+she or an will my one all would there their what so up out if about who get which go me when make can like
+time no just him know take people into year your good some could them see other than then now look only
+come its over think also back after use two how our work first well way even new want because any these give
+day most us is are was were has had did said am been being hello hi yes please thank thanks sorry help name
+love friend family home school water food eat drink sleep mother father sister brother baby boy girl man
+woman child again more less stop go come where why right left nice happy sad tired sick bad fine okay learn
+sign language deaf hear hearing understand slow fast morning night today tomorrow yesterday week month
+money buy pay work play book read write class teacher student doctor hospital bathroom house car bus
+walk run wait finish start need feel see meet later soon welcome goodbye bye excuse me question answer
+""".split()
+
+class Lexicon:
+    """Compact trie of words with unigram log-probabilities and precomputed top completions."""
+
+    def __init__(self, words, logprobs, node_chars, child_start, word_ids, best_logprobs, top_words):
+        self.words = words
+        self.logprobs = logprobs
+        # Per node: its letter, the start of its children (child_start[i]:child_start[i + 1]),
+        # the word it ends (-1 if none), the best log-probability below it and its top completions
+        self.node_chars = node_chars
+        self.child_start = child_start
+        self.word_ids = word_ids
+        self.best_logprobs = best_logprobs
+        self.top_words = top_words
+        self.min_logprob = min(logprobs) if len(logprobs) else 0.0
+
+    @classmethod
+    def from_counts(cls, counts):
+        """Builds the lexicon from a {word: count} mapping."""
+        counts = {word.upper(): count for word, count in counts.items()
+                  if word.isalpha() and all(char in LABELS for char in word.upper())}
+        words = sorted(counts)
+        total = float(sum(counts.values()))
+        logprobs = array('f', (math.log(counts[word] / total) for word in words))
+
+        # Breadth-first numbering keeps each node's children contiguous
+        children = [{}]
+        word_at = [-1]
+        for word_id, word in enumerate(words):
+            node = 0
+            for char in word:
+                child = children[node].get(char)
+                if child is None:
+                    child = len(children)
+                    children.append({})
+                    word_at.append(-1)
+                    children[node][char] = child
+                node = child
+            word_at[node] = word_id
+
+        order = []
+        queue = deque([(0, '')])
+        while queue:
+            node, char = queue.popleft()
+            order.append((node, char))
+            for child_char in sorted(children[node]):
+                queue.append((children[node][child_char], child_char))
+
+        node_chars = bytes(ord(char) if char else 0 for _, char in order)
+        child_start = array('i', [0] * (len(order) + 1))
+        next_child = 1
+        for i, (node, _) in enumerate(order):
+            child_start[i] = next_child
+            next_child += len(children[node])
+        child_start[len(order)] = next_child
+        word_ids = array('i', (word_at[node] for node, _ in order))
+
+        # Best completions, merged bottom-up from the children
+        best_logprobs = array('f', [-math.inf] * len(order))
+        top_words = array('i', [-1] * (len(order) * SUGGESTIONS))
+        for i in reversed(range(len(order))):
+            candidates = [word_ids[i]] if word_ids[i] >= 0 else []
+            for child in range(child_start[i], child_start[i + 1]):
+                candidates.extend(w for w in top_words[child * SUGGESTIONS:(child + 1) * SUGGESTIONS] if w >= 0)
+            candidates.sort(key=lambda w: -logprobs[w])
+            for k, word_id in enumerate(candidates[:SUGGESTIONS]):
+                top_words[i * SUGGESTIONS + k] = word_id
+            if candidates:
+                best_logprobs[i] = logprobs[candidates[0]]
+        return cls(words, logprobs, node_chars, child_start, word_ids, best_logprobs, top_words)
+
+    @classmethod
+    def from_word_list(cls, path):
+        """Reads `word [count]` lines; words without a count are weighted by rank (Zipf)."""
+        counts = {}
+        with open(path) as f:
+            lines = [line.split() for line in f if line.strip()]
+        for rank, parts in enumerate(lines, start=1):
+            counts[parts[0]] = float(parts[1]) if len(parts) > 1 else 1.0 / rank
+        return cls.from_counts(counts)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(
+            words=[str(word) for word in data['words']],
+            logprobs=array('f', data['logprobs'].tobytes()),
+            node_chars=data['node_chars'].tobytes(),
+            child_start=array('i', data['child_start'].astype(np.int32).tobytes()),
+            word_ids=array('i', data['word_ids'].astype(np.int32).tobytes()),
+            best_logprobs=array('f', data['best_logprobs'].tobytes()),
+            top_words=array('i', data['top_words'].astype(np.int32).tobytes()),
+        )
+
+    def save(self, path):
+        np.savez(path, words=np.array(self.words), logprobs=np.frombuffer(self.logprobs, dtype=np.float32),
+                 node_chars=np.frombuffer(self.node_chars, dtype=np.uint8),
+                 child_start=np.frombuffer(self.child_start, dtype=np.int32),
+                 word_ids=np.frombuffer(self.word_ids, dtype=np.int32),
+                 best_logprobs=np.frombuffer(self.best_logprobs, dtype=np.float32),
+                 top_words=np.frombuffer(self.top_words, dtype=np.int32))
+
+    def child(self, node, char):
+        """Returns the child of `node` for `char`, or -1."""
+        if node < 0:
+            return -1
+        return self.node_chars.find(ord(char), self.child_start[node], self.child_start[node + 1])
+
+    def completions(self, node):
+        """Returns the most likely words starting with the prefix of `node`."""
+        if node < 0:
+            return []
+        ids = self.top_words[node * SUGGESTIONS:(node + 1) * SUGGESTIONS]
+        return [self.words[word_id] for word_id in ids if word_id >= 0]
+
+def load_lexicon(path=LEXICON_PATH):
+    """Loads a precomputed lexicon, falling back to the built-in list of common words."""
+    if os.path.exists(path):
+        try:
+            lexicon = Lexicon.load(path)
+            print(f"Lexicon of {len(lexicon.words)} words loaded from {path}")
+            return lexicon
+        except Exception as e:
+            print(f"Error loading lexicon: {e}")
+    counts = {}
+    for rank, word in enumerate(COMMON_WORDS, start=1):
+        counts.setdefault(word, 1.0 / rank)
+    return Lexicon.from_counts(counts)
+
+class WordDecoder:
+    """
+    Per-stream prefix beam search for the word being fingerspelled.
+    Feed every frame's class probabilities to `step` (or call `step_blank` for
+    frames without a hand) and call `end_word` at a word boundary.
+    """
+
+    def __init__(self, lexicon, beam_width=BEAM_WIDTH, lm_weight=LM_WEIGHT):
+        self.lexicon = lexicon
+        self.beam_width = beam_width
+        self.lm_weight = lm_weight
+        self.reset()
+
+    def reset(self):
+        """Starts a new word."""
+        # prefix -> [p_blank, p_non_blank, trie node, letters outside the lexicon]
+        self._beams = {'': [1.0, 0.0, 0, 0]}
+
+    def _score(self, entry):
+        pb, pnb, node, outside = entry
+        if node >= 0:
+            return (pb + pnb) * math.exp(self.lm_weight * self.lexicon.best_logprobs[node])
+        return (pb + pnb) * math.exp(self.lm_weight * (self.lexicon.min_logprob + OOV_PENALTY * outside))
+
+    def step(self, probabilities):
+        """Advances the beams by one frame of letter probabilities."""
+        probabilities = np.asarray(probabilities, dtype=np.float32).reshape(-1)
+        # Whatever the model is not confident about counts as a blank
+        p_blank = 1.0 - float(probabilities.max())
+        candidates = np.argpartition(probabilities, -TOP_LETTERS)[-TOP_LETTERS:]
+        letters = [(LABELS[i], float(probabilities[i])) for i in candidates if probabilities[i] >= MIN_LETTER_PROB]
+        self._advance(p_blank, letters)
+
+    def step_blank(self):
+        """Advances the beams by a frame without a hand."""
+        self._advance(1.0, ())
+
+    def _advance(self, p_blank, letters):
+        beams = {}
+        for prefix, (pb, pnb, node, outside) in self._beams.items():
+            total = pb + pnb
+            entry = beams.setdefault(prefix, [0.0, 0.0, node, outside])
+            entry[0] += total * p_blank
+            last = prefix[-1] if prefix else None
+            for char, p in letters:
+                if char == last:
+                    # A held letter stays one letter; a repeat needs a blank in between
+                    entry[1] += pnb * p
+                    extended = pb * p
+                else:
+                    extended = total * p
+                if extended <= 0.0:
+                    continue
+                new_prefix = prefix + char
+                new_entry = beams.get(new_prefix)
+                if new_entry is None:
+                    child = self.lexicon.child(node, char)
+                    new_entry = beams[new_prefix] = [0.0, 0.0, child, 0 if child >= 0 else outside + 1]
+                new_entry[1] += extended
+
+        kept = sorted(beams.items(), key=lambda item: -self._score(item[1]))[:self.beam_width]
+        # Renormalize so long words do not underflow
+        norm = sum(entry[0] + entry[1] for _, entry in kept) or 1.0
+        self._beams = {prefix: [pb / norm, pnb / norm, node, outside] for prefix, (pb, pnb, node, outside) in kept}
+
+    def _best(self):
+        return max(self._beams.items(), key=lambda item: self._score(item[1]))
+
+    @property
+    def prefix(self):
+        """The most likely letters of the word in progress."""
+        return self._best()[0]
+
+    def suggestions(self):
+        """The most likely lexicon words starting with the current prefix."""
+        prefix, (_, _, node, _) = self._best()
+        return self.lexicon.completions(node) if prefix else []
+
+    def end_word(self):
+        """
+        Commits the word in progress and starts a new one.
+        Returns:
+            str: The decoded letters, or an empty string if nothing was signed.
+        """
+        word = self.prefix
+        self.reset()
+        return word
+
+    def accept_suggestion(self, index):
+        """Commits the suggestion at `index` instead of the spelled prefix, returning it or None."""
+        suggestions = self.suggestions()
+        if index >= len(suggestions):
+            return None
+        self.reset()
+        return suggestions[index]
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the decoder lexicon from a word list.")
+    parser.add_argument('words', help="Text file with one word and an optional count per line")
+    parser.add_argument('-o', '--output', default=LEXICON_PATH)
+    args = parser.parse_args()
+
+    lexicon = Lexicon.from_word_list(args.words)
+    lexicon.save(args.output)
+    print(f"Saved a lexicon of {len(lexicon.words)} words and {len(lexicon.node_chars)} trie nodes to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Exports the trained Keras model as float32, float16 and full-int8 TFLite variants.
+
+The int8 variant is calibrated on a representative sample of the training CSV. Every
+variant is then evaluated on the test CSV and timed on single frames, and its file
+size, accuracy, latency and version string are recorded in model_registry.json. The
+app selects a variant by name with SIGN_MODEL_VARIANT and logs its version.
+
+Usage:
+    python export_model.py
+    python export_model.py --model sign_model.h5 --variants float32 int8
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from model import (DEFAULT_MODEL_VERSION, MODEL_REGISTRY_PATH, TFLiteBackend, load_model_registry,
+                   load_sign_model, save_model_registry)
+
+TRAIN_CSV = "sign_mnist_train.csv"
+TEST_CSV = "sign_mnist_test.csv"
+VARIANTS = ('float32', 'float16', 'int8')
+
+def load_csv_images(csv_path, input_shape, limit=None):
+    """
+    Reads sign-MNIST rows and resizes them to the model's input shape.
+    Returns:
+        tuple: (images, labels) with images as float32 in [0, 1].
+    """
+    df = pd.read_csv(csv_path, nrows=limit)
+    labels = df["label"].values
+    images = df.drop("label", axis=1).values.reshape(-1, 28, 28, 1).astype(np.float32) / 255.0
+    height, width, channels = input_shape
+    images = tf.image.resize(images, (height, width)).numpy()
+    if channels != 1:
+        images = np.repeat(images, channels, axis=-1)
+    return images, labels
+
+def convert(model, variant, calibration_images=None):
+    """Converts a Keras model to TFLite with the quantization of the given variant."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == 'int8':
+        def representative_dataset():
+            for image in calibration_images:
+                yield [image[np.newaxis]]
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+def evaluate(backend, images, labels, batch_size=256):
+    """Returns the accuracy of a backend on labelled images."""
+    correct = 0
+    for start in range(0, len(images), batch_size):
+        predictions = backend.predict_batch(images[start:start + batch_size])
+        correct += int(np.sum(np.argmax(predictions, axis=1) == labels[start:start + batch_size]))
+    return correct / len(images)
+
+def measure_latency(backend, image, iterations=200):
+    """Returns the median single-frame latency of a backend in milliseconds."""
+    for _ in range(10):
+        backend.predict(image)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        backend.predict(image)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+def export_variants(model, variants=VARIANTS, version=DEFAULT_MODEL_VERSION, output_prefix="sign_model",
+                    registry_path=MODEL_REGISTRY_PATH, calibration_samples=300, name_prefix="", keras_path=None):
+    """
+    Exports, evaluates and registers TFLite variants of a trained model.
+    Variants are registered as `name_prefix + variant`, e.g. 'int8' or 'ft-20260101-int8',
+    together with `keras_path`, the saved Keras model they were exported from.
+    Returns:
+        dict: The updated registry.
+    """
+    input_shape = tuple(model.input_shape[1:])
+    calibration_images, _ = load_csv_images(TRAIN_CSV, input_shape, limit=calibration_samples)
+    test_images, test_labels = load_csv_images(TEST_CSV, input_shape)
+
+    registry = load_model_registry(registry_path)
+    for variant in variants:
+        # float32 keeps the historical file name so the default TFLite backend picks it up
+        path = f"{output_prefix}.tflite" if variant == 'float32' else f"{output_prefix}_{variant}.tflite"
+        with open(path, "wb") as f:
+            f.write(convert(model, variant, calibration_images))
+
+        backend = TFLiteBackend(path)
+        entry = {
+            'path': path,
+            'version': f"{version}-{variant}",
+            'size_bytes': os.path.getsize(path),
+            'accuracy': round(evaluate(backend, test_images, test_labels), 4),
+            'latency_ms': round(measure_latency(backend, test_images[:1]), 4),
+            'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        if keras_path:
+            entry['keras_path'] = keras_path
+        registry['variants'][name_prefix + variant] = entry
+        print(f"{name_prefix + variant:>8}: {entry['size_bytes'] / 1024:.0f} KB, accuracy {entry['accuracy']*100:.2f}%, "
+              f"{entry['latency_ms']:.3f} ms/frame -> {path}")
+
+    save_model_registry(registry, registry_path)
+    print(f"Model registry updated: {registry_path}")
+    return registry
+
+def main():
+    parser = argparse.ArgumentParser(description="Export quantized TFLite variants of the sign model.")
+    parser.add_argument('--model', default='sign_model.h5', help="Trained Keras model to export")
+    parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument('--version', default=DEFAULT_MODEL_VERSION, help="Version prefix recorded for each variant")
+    args = parser.parse_args()
+
+    model = load_sign_model(args.model)
+    if model is None:
+        raise SystemExit(1)
+    export_variants(model, variants=args.variants, version=args.version, keras_path=args.model)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Hand localization for the live interpreter.
+
+Every frame is first downscaled to DETECT_WIDTH, and both paths below run on that
+small frame. A skin-colour detector finds the hand every few frames: the frame is
+segmented in YCrCb space and cleaned up with morphology. Skin blobs of face size or
+centred in the top of the frame are ignored, and of the rest the one overlapping the
+centre ROI most becomes the hand box. In between detections a CamShift tracker
+follows the box on the hue back-projection of the last detected hand. At this size
+both cost well under a millisecond and tracking is only slightly cheaper; it mainly
+keeps the box following the hand when the skin mask breaks up between detections.
+When neither finds a hand the tracker reports None, so the caller can skip
+classification instead of classifying the background.
+"""
+import os
+
+import cv2
+import numpy as np
+
+# Run the full detector every N frames and track the box in between
+HAND_DETECT_EVERY = int(os.getenv("HAND_DETECT_EVERY", 5))
+# Frames without a hand after which the current letter is abandoned
+HAND_LOST_FRAMES = 10
+# Width the frame is downscaled to before detection and tracking
+DETECT_WIDTH = 160
+# Smallest and largest skin blob accepted as a hand, as a fraction of the frame area
+MIN_HAND_AREA = 0.02
+MAX_HAND_AREA = 0.2
+# Blobs centred in this top fraction of the frame are taken for the face and ignored
+FACE_ZONE = 0.35
+# Side of the fixed centre ROI, as in FramePreprocessor; detection prefers the blob overlapping it most
+SEED_ROI_SIZE = 300
+# YCrCb skin range
+SKIN_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+SKIN_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+# Dark and grey pixels have no reliable hue; they are left out of the tracker's histogram
+TRACK_HSV_LOWER = np.array([0, 60, 32], dtype=np.uint8)
+TRACK_HSV_UPPER = np.array([180, 255, 255], dtype=np.uint8)
+# Mean back-projection (0-255) a tracked window needs to still count as a hand
+MIN_TRACK_SCORE = 20
+# Margin added around the detected hand, as a fraction of the box side
+BOX_MARGIN = 0.25
+
+class HandTracker:
+    """Per-stream hand box tracking. Returns square boxes ready for `FramePreprocessor`."""
+
+    def __init__(self, detect_every=HAND_DETECT_EVERY, min_area=MIN_HAND_AREA):
+        self.detect_every = detect_every
+        self.min_area = min_area
+        self._frames = 0
+        # Hand window in full-frame coordinates, and the same window in the downscaled frame
+        self._window = None
+        self._small_window = None
+        self._scale = 1.0
+        self._small = None
+        self._hist = None
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        self._criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 1)
+
+    def update(self, frame):
+        """
+        Locates the hand in a BGR frame.
+        Returns:
+            tuple: (x1, y1, x2, y2) square box inside the frame, or None if no hand is visible.
+        """
+        small = self._downscale(frame)
+        if self._small_window is None or self._frames % self.detect_every == 0:
+            self._small_window = self._detect(small)
+        else:
+            self._small_window = self._track(small)
+        self._frames += 1
+        if self._small_window is None:
+            self._window = None
+            return None
+        x, y, bw, bh = self._small_window
+        self._window = (int(x / self._scale), int(y / self._scale),
+                        max(1, int(bw / self._scale)), max(1, int(bh / self._scale)))
+        return self._square_box(frame.shape)
+
+    def reset(self):
+        """Forgets the tracked hand, e.g. when a new stream starts."""
+        self._frames = 0
+        self._window = None
+        self._small_window = None
+        self._hist = None
+
+    def _downscale(self, frame):
+        """Resizes the frame to DETECT_WIDTH into a reused buffer; detection and tracking both run on it."""
+        h, w = frame.shape[:2]
+        self._scale = DETECT_WIDTH / w
+        size = (DETECT_WIDTH, max(1, int(h * self._scale)))
+        if self._small is None or self._small.shape[1::-1] != size:
+            self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        return self._small
+
+    def _detect(self, small):
+        mask = cv2.inRange(cv2.cvtColor(small, cv2.COLOR_BGR2YCrCb), SKIN_LOWER, SKIN_UPPER)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self._kernel)
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        h, w = mask.shape
+        # The face is usually the largest skin blob; skip blobs of face size or in the face zone
+        boxes = [cv2.boundingRect(contour) for contour in contours
+                 if self.min_area * mask.size <= cv2.contourArea(contour) <= MAX_HAND_AREA * mask.size]
+        boxes = [box for box in boxes if box[1] + box[3] / 2 >= FACE_ZONE * h]
+        if not boxes:
+            return None
+        # Seed from the centre ROI where the user is asked to sign
+        seed = min(SEED_ROI_SIZE * self._scale, w, h)
+        sx1, sy1 = (w - seed) / 2, (h - seed) / 2
+
+        def seed_overlap(box):
+            x, y, bw, bh = box
+            overlap_w = max(0.0, min(x + bw, sx1 + seed) - max(x, sx1))
+            overlap_h = max(0.0, min(y + bh, sy1 + seed) - max(y, sy1))
+            return overlap_w * overlap_h, bw * bh
+
+        x, y, bw, bh = max(boxes, key=seed_overlap)
+
+        # Hue histogram of the skin pixels in the box, for tracking until the next detection
+        hsv = cv2.cvtColor(small[y:y + bh, x:x + bw], cv2.COLOR_BGR2HSV)
+        skin = mask[y:y + bh, x:x + bw] & cv2.inRange(hsv, TRACK_HSV_LOWER, TRACK_HSV_UPPER)
+        self._hist = cv2.calcHist([hsv], [0], skin, [16], [0, 180])
+        cv2.normalize(self._hist, self._hist, 0, 255, cv2.NORM_MINMAX)
+        return (x, y, bw, bh)
+
+    def _track(self, small):
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        back_projection = cv2.calcBackProject([hsv], [0], self._hist, [0, 180], 1)
+        back_projection &= cv2.inRange(hsv, TRACK_HSV_LOWER, TRACK_HSV_UPPER)
+        _, window = cv2.CamShift(back_projection, self._small_window, self._criteria)
+        x, y, bw, bh = window
+        # A collapsed window, or one with little hand colour left in it, means the hand was lost
+        if bw * bh < self.min_area * back_projection.size:
+            return None
+        if back_projection[y:y + bh, x:x + bw].mean() < MIN_TRACK_SCORE:
+            return None
+        # Drifting up onto the face counts as losing the hand too
+        if y + bh / 2 < FACE_ZONE * back_projection.shape[0]:
+            return None
+        return (int(x), int(y), int(bw), int(bh))
+
+    def _square_box(self, frame_shape):
+        """Pads the tracked window into a square with a margin, clamped to the frame."""
+        h, w = frame_shape[:2]
+        x, y, bw, bh = self._window
+        side = min(int(max(bw, bh) * (1 + BOX_MARGIN)), h, w)
+        cx, cy = x + bw // 2, y + bh // 2
+        x1 = min(max(cx - side // 2, 0), w - side)
+        y1 = min(max(cy - side // 2, 0), h - side)
+        return x1, y1, x1 + side, y1 + side
@@ -0,0 +1,122 @@
+"""
+Client for the WebSocket inference service, and a synthetic load test.
+
+`InferenceServiceClient` is what the Streamlit app uses as a thin client when
+INFERENCE_SERVICE_URL is set: each video stream opens one connection and sends
+its frames as JPEG. Run this module directly to load-test a service with
+synthetic frames (a skin-coloured blob moving over a noisy background) from any
+number of concurrent streams, and print latency percentiles and throughput.
+
+Usage:
+    python inference_client.py --url ws://localhost:8765 --streams 8 --frames 300 --fps 15
+"""
+import argparse
+import base64
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+INFERENCE_SERVICE_URL = os.getenv("INFERENCE_SERVICE_URL", "")
+JPEG_QUALITY = 80
+# Seconds a stream waits before reconnecting to an unreachable service
+RECONNECT_SECONDS = 5.0
+
+class InferenceServiceClient:
+    """Blocking connection to the inference service for one video stream."""
+
+    def __init__(self, url=INFERENCE_SERVICE_URL, track_hand=True, timeout=5.0):
+        from websockets.sync.client import connect
+        self.timeout = timeout
+        self._connection = connect(url, open_timeout=timeout, max_size=None)
+        self._encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY]
+        if not track_hand:
+            self._connection.send(json.dumps({"type": "config", "track_hand": False}))
+
+    def process(self, frame):
+        """
+        Sends one BGR frame and waits for its result.
+        Returns:
+            dict: The service's result; a letter's `roi_crop` is decoded back to bytes.
+        """
+        ok, encoded = cv2.imencode(".jpg", frame, self._encode_params)
+        if not ok:
+            return {"error": "could not encode frame"}
+        self._connection.send(encoded.tobytes())
+        result = json.loads(self._connection.recv(timeout=self.timeout))
+        letter = result.get("letter")
+        if letter:
+            letter["roi_crop"] = base64.b64decode(letter["roi_crop"])
+        return result
+
+    def reset(self):
+        self._connection.send(json.dumps({"type": "reset"}))
+
+    def close(self):
+        self._connection.close()
+
+def synthetic_frames(count, width=640, height=480, seed=0):
+    """Yields frames with a skin-coloured hand-sized blob drifting over a noisy background."""
+    rng = np.random.default_rng(seed)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    for i in range(count):
+        frame[:] = rng.integers(0, 60, size=(height, width, 3), dtype=np.uint8)
+        center = (int(width / 2 + 120 * np.sin(i / 20)), int(height / 2 + 60 * np.cos(i / 30)))
+        cv2.ellipse(frame, center, (70, 100), 0, 0, 360, (120, 150, 200), -1)
+        yield frame
+
+def _run_stream(url, frames, fps, seed, latencies, errors):
+    try:
+        client = InferenceServiceClient(url)
+    except Exception as e:
+        errors.append(str(e))
+        return
+    interval = 1.0 / fps if fps else 0.0
+    next_frame = time.perf_counter()
+    try:
+        for frame in synthetic_frames(frames, seed=seed):
+            start = time.perf_counter()
+            result = client.process(frame)
+            latencies.append(time.perf_counter() - start)
+            if "error" in result:
+                errors.append(result["error"])
+            if interval:
+                next_frame += interval
+                time.sleep(max(0.0, next_frame - time.perf_counter()))
+    except Exception as e:
+        errors.append(str(e))
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the inference service with synthetic frames.")
+    parser.add_argument('--url', default=INFERENCE_SERVICE_URL or "ws://localhost:8765")
+    parser.add_argument('--streams', type=int, default=4, help="Concurrent video streams")
+    parser.add_argument('--frames', type=int, default=300, help="Frames sent per stream")
+    parser.add_argument('--fps', type=float, default=15.0, help="Frame rate per stream; 0 sends as fast as possible")
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    threads = [threading.Thread(target=_run_stream, args=(args.url, args.frames, args.fps, i, latencies, errors))
+               for i in range(args.streams)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        raise SystemExit(f"No frames were processed: {errors[:1]}")
+    timings = np.array(latencies) * 1000
+    print(f"{args.streams} streams, {len(latencies)} frames in {elapsed:.1f} s ({len(latencies) / elapsed:.1f} frames/s)")
+    print(f"Round-trip latency: p50 {np.percentile(timings, 50):.1f} ms, p95 {np.percentile(timings, 95):.1f} ms, "
+          f"p99 {np.percentile(timings, 99):.1f} ms")
+    if errors:
+        print(f"{len(errors)} errors, first: {errors[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Standalone WebSocket inference service.
+
+Runs the single-frame recognition pipeline of the live interpreter (hand tracking,
+ROI preprocessing, change gate, batched model inference and letter vote) outside
+Streamlit, so inference nodes can be scaled independently of UI nodes. Clients send
+JPEG-encoded frames as binary WebSocket messages and receive one JSON message per
+frame:
+
+    {"sign": "A", "confidence": 0.97, "probabilities": [...], "box": [x1, y1, x2, y2],
+     "hand": true, "letter": {"sign": "A", "confidence": 0.97, "roi_crop": "<base64>"},
+     "model_version": "v1.0-64x64"}
+
+`letter` is only set when the vote accepts a new letter, and `sign` is None for
+frames without a hand. A text message {"type": "reset"} starts the letter over.
+
+Each worker process runs its own asyncio server on the shared port (SO_REUSEPORT,
+so the kernel spreads connections across them), loads its own model and batches
+frames from all of its connections. On Linux every worker is pinned to one core.
+
+Usage:
+    python inference_service.py --workers 4 --port 8765
+    python inference_client.py --streams 8        # synthetic load test
+"""
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from hand_tracking import HAND_LOST_FRAMES, HandTracker
+from inference_worker import BatchInferenceWorker
+from model import LABELS, FrameChangeGate, FramePreprocessor, load_inference_backend
+from stabilizer import LetterStabilizer
+
+SERVICE_HOST = os.getenv("INFERENCE_SERVICE_HOST", "0.0.0.0")
+SERVICE_PORT = int(os.getenv("INFERENCE_SERVICE_PORT", 8765))
+SERVICE_WORKERS = int(os.getenv("INFERENCE_SERVICE_WORKERS", os.cpu_count() or 1))
+# Largest accepted frame message
+MAX_FRAME_BYTES = 2 ** 21
+
+class StreamSession:
+    """
+    Per-connection recognition state, mirroring `SignVideoTransformer` in the app.
+    `process` is synchronous and runs on the service's thread pool.
+    """
+
+    def __init__(self, inference_worker, track_hand=True):
+        self.inference_worker = inference_worker
+        self.preprocessor = FramePreprocessor(target_size=inference_worker.backend.target_size)
+        self.hand_tracker = HandTracker() if track_hand else None
+        self.gate = FrameChangeGate()
+        self.stabilizer = LetterStabilizer(window=5, confidence_threshold=0.90)
+        self.frames_without_hand = 0
+
+    def reset(self):
+        self.frames_without_hand = 0
+        self.stabilizer.reset()
+        if self.hand_tracker:
+            self.hand_tracker.reset()
+
+    def process(self, frame_bytes):
+        """Decodes and classifies one JPEG frame, returning the JSON-ready result."""
+        img = cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return {"error": "could not decode frame"}
+
+        box = None
+        if self.hand_tracker:
+            box = self.hand_tracker.update(img)
+            if box is None:
+                # Start the letter over if the hand stays away
+                self.frames_without_hand += 1
+                if self.frames_without_hand == HAND_LOST_FRAMES:
+                    self.stabilizer.reset()
+                return {"sign": None, "hand": False}
+            self.frames_without_hand = 0
+
+        processed_img, _ = self.preprocessor(img, box=box)
+        if self.gate.should_infer(processed_img):
+            output = self.inference_worker.predict(processed_img)
+            if output is None:
+                return {"error": "inference timed out"}
+            self.gate.update(processed_img, output)
+        else:
+            output = self.gate.last_prediction
+
+        prediction = np.reshape(output, -1)
+        predicted_index = int(np.argmax(prediction))
+        confidence = float(prediction[predicted_index])
+        result = {
+            "sign": LABELS[predicted_index],
+            "confidence": round(confidence, 4),
+            "probabilities": [round(float(p), 4) for p in prediction],
+            "hand": True,
+            "box": list(self.preprocessor.box),
+            "model_version": self.inference_worker.backend.version,
+        }
+        accepted_sign = self.stabilizer.update(result["sign"], confidence)
+        if accepted_sign:
+            result["letter"] = {
+                "sign": accepted_sign,
+                "confidence": round(confidence, 4),
+                "roi_crop": base64.b64encode(self.preprocessor.resized.tobytes()).decode('ascii'),
+            }
+        return result
+
+async def _handle(websocket, inference_worker, executor):
+    loop = asyncio.get_running_loop()
+    session = StreamSession(inference_worker)
+    async for message in websocket:
+        if isinstance(message, str):
+            try:
+                command = json.loads(message)
+                if not isinstance(command, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                # A malformed command is reported, not allowed to drop the connection
+                await websocket.send(json.dumps({"error": f"invalid command: {e}"}))
+                continue
+            if command.get("type") == "reset":
+                session.reset()
+            elif command.get("type") == "config":
+                session = StreamSession(inference_worker, track_hand=command.get("track_hand", True))
+            continue
+        # Decoding and preprocessing are CPU work; keep them off the event loop
+        result = await loop.run_in_executor(executor, session.process, message)
+        await websocket.send(json.dumps(result))
+
+def _pin_to_core(index):
+    """Pins the current process to one core, where the OS supports it."""
+    if hasattr(os, "sched_setaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+        core = cores[index % len(cores)]
+        os.sched_setaffinity(0, {core})
+        return core
+    return None
+
+async def _serve(host, port, reuse_port):
+    import websockets
+
+    backend = load_inference_backend()
+    if backend is None:
+        raise SystemExit("Could not load the sign language model.")
+    inference_worker = BatchInferenceWorker(backend)
+    # Threads for frame decoding and preprocessing; inference itself is batched by the worker
+    executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="frames")
+
+    async def handler(websocket, *args):
+        await _handle(websocket, inference_worker, executor)
+
+    async with websockets.serve(handler, host, port, max_size=MAX_FRAME_BYTES, reuse_port=reuse_port):
+        print(f"Inference worker {os.getpid()} listening on ws://{host}:{port} with model {backend.version}")
+        await asyncio.Future()
+
+def run_worker(index, host, port, pin, reuse_port):
+    core = _pin_to_core(index) if pin else None
+    if core is not None:
+        print(f"Inference worker {os.getpid()} pinned to core {core}")
+    try:
+        asyncio.run(_serve(host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve sign recognition over WebSocket.")
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--workers', type=int, default=SERVICE_WORKERS, help="Worker processes, one model each")
+    parser.add_argument('--no-pin', action='store_true', help="Do not pin worker processes to cores")
+    args = parser.parse_args()
+
+    # Several processes can only share a port with SO_REUSEPORT (Linux, BSD, macOS)
+    reuse_port = sys.platform != "win32"
+    workers = args.workers if reuse_port else 1
+    if workers == 1:
+        # A single worker keeps every core for the model's own threads
+        run_worker(0, args.host, args.port, False, reuse_port)
+        return
+
+    processes = [multiprocessing.Process(target=run_worker, args=(i, args.host, args.port, not args.no_pin, reuse_port),
+                                         name=f"inference-worker-{i}")
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+if __name__ == "__main__":
+    main()
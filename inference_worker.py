@@ -0,0 +1,112 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import INFERENCE_BATCH_SECONDS, INFERENCE_BATCH_SIZE, INFERENCE_QUEUE_DEPTH
+
+# Batching limits for the shared inference worker
+MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 16))
+MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 5))
+
+_STOP = object()
+
+class BatchInferenceWorker:
+    """
+    Shared inference worker for all webrtc sessions.
+    Frames submitted by each SignVideoTransformer are queued here and classified
+    together in a single batched forward pass. A batch is dispatched as soon as it
+    holds `max_batch_size` frames or the oldest frame has waited `max_wait_ms`.
+    """
+
+    def __init__(self, backend, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        # Frames are copied into this buffer so the forward pass never allocates its input
+        self._batch = np.zeros((max_batch_size,) + tuple(backend.input_shape[1:]), dtype=np.float32)
+        self._thread = threading.Thread(target=self._run, name="batch-inference-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, processed_img):
+        """
+        Queues a preprocessed frame for classification.
+        The frame must not be modified until the returned future is done.
+        Args:
+            processed_img (numpy.ndarray): Output of `preprocess_image`.
+        Returns:
+            concurrent.futures.Future: Resolves to the class probabilities for the frame.
+        """
+        future = Future()
+        self._queue.put((processed_img, future))
+        INFERENCE_QUEUE_DEPTH.set(self._queue.qsize())
+        return future
+
+    def predict(self, processed_img, timeout=1.0):
+        """
+        Classifies a frame through the shared batch and waits for its result.
+        Returns:
+            numpy.ndarray: The class probabilities, or None if the worker did not answer in time.
+        """
+        future = self.submit(processed_img)
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            future.cancel()
+            print(f"Batched inference failed: {e}")
+            return None
+
+    def close(self):
+        """Stops the worker after the frames already queued have been classified."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            pending = [item]
+            deadline = time.monotonic() + self.max_wait
+
+            # Collect more frames until the batch is full or the deadline passes
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                pending.append(item)
+
+            INFERENCE_QUEUE_DEPTH.set(self._queue.qsize())
+            self._run_batch(pending)
+
+    def _run_batch(self, pending):
+        # Skip frames whose stream gave up waiting
+        pending = [(img, future) for img, future in pending if future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+        INFERENCE_BATCH_SIZE.observe(len(pending))
+        try:
+            with INFERENCE_BATCH_SECONDS.time():
+                for i, (img, _) in enumerate(pending):
+                    np.copyto(self._batch[i], img.reshape(img.shape[-3:]), casting='unsafe')
+                predictions = self.backend.predict_batch(self._batch[:len(pending)])
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        # Route each row back to the stream that submitted it
+        for (_, future), prediction in zip(pending, predictions):
+            future.set_result(prediction)
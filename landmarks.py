@@ -0,0 +1,151 @@
+"""
+Landmark recognition mode.
+
+MediaPipe Hands finds the 21 hand keypoints in each frame; they are normalized
+into a 63-float feature vector that does not depend on where the hand is, how
+big it is or which hand signs. A small dense network classifies that vector in
+numpy, which costs a few thousand multiply-adds per frame instead of a CNN pass,
+so it runs directly in each stream's video thread.
+
+MediaPipe is an optional dependency, imported only when this mode is used.
+"""
+import numpy as np
+
+from model import LABELS
+
+LANDMARK_MODEL_PATH = 'sign_landmark_mlp.npz'
+LANDMARK_MODEL_VERSION = "v1.0-landmark-mlp"
+NUM_LANDMARKS = 21
+FEATURE_SIZE = NUM_LANDMARKS * 3
+
+def normalize_landmarks(points, handedness=None, out=None):
+    """
+    Turns (21, 3) keypoints into a translation-, scale- and hand-invariant feature vector.
+    Args:
+        points (numpy.ndarray): Keypoints in pixels, wrist first, as from `LandmarkExtractor`.
+        handedness (str): 'Left' or 'Right'; left hands are mirrored onto right hands.
+        out (numpy.ndarray): Optional float32 buffer of FEATURE_SIZE values to write into.
+    Returns:
+        numpy.ndarray: The feature vector.
+    """
+    if out is None:
+        out = np.empty(FEATURE_SIZE, dtype=np.float32)
+    features = out.reshape(NUM_LANDMARKS, 3)
+    np.subtract(points, points[0], out=features)
+    if handedness == 'Left':
+        features[:, 0] *= -1
+    scale = np.abs(features[:, :2]).max()
+    if scale > 0:
+        features /= scale
+    return out
+
+class LandmarkExtractor:
+    """
+    Per-stream MediaPipe hand keypoint extractor.
+    In video mode MediaPipe tracks the hand between frames and only reruns its palm
+    detector when tracking is lost, so each stream needs its own instance.
+    """
+
+    def __init__(self, static_image_mode=False, min_detection_confidence=0.5):
+        import mediapipe as mp
+        self._hands = mp.solutions.hands.Hands(
+            static_image_mode=static_image_mode,
+            max_num_hands=1,
+            model_complexity=0,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=0.5,
+        )
+        self._points = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+        self.features = np.empty(FEATURE_SIZE, dtype=np.float32)
+
+    def __call__(self, frame):
+        """
+        Extracts hand keypoints from a BGR frame.
+        Returns:
+            tuple: (features, box) where features is the normalized vector (owned by the
+                extractor and overwritten by the next call) and box a square (x1, y1, x2, y2)
+                around the hand, or (None, None) if no hand was found.
+        """
+        import cv2
+        results = self._hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if not results.multi_hand_landmarks:
+            return None, None
+
+        h, w = frame.shape[:2]
+        for i, landmark in enumerate(results.multi_hand_landmarks[0].landmark):
+            # Depth is on roughly the same scale as x
+            self._points[i] = (landmark.x * w, landmark.y * h, landmark.z * w)
+        handedness = results.multi_handedness[0].classification[0].label
+        normalize_landmarks(self._points, handedness, out=self.features)
+        return self.features, self._box(w, h)
+
+    def _box(self, w, h):
+        """Square box around the keypoints with a margin, clamped to the frame."""
+        x_min, y_min = self._points[:, :2].min(axis=0)
+        x_max, y_max = self._points[:, :2].max(axis=0)
+        side = int(min(max(x_max - x_min, y_max - y_min) * 1.4, w, h))
+        if side < 1:
+            return None
+        x1 = int(min(max((x_min + x_max - side) / 2, 0), w - side))
+        y1 = int(min(max((y_min + y_max - side) / 2, 0), h - side))
+        return x1, y1, x1 + side, y1 + side
+
+    def close(self):
+        self._hands.close()
+
+def save_landmark_model(model, path=LANDMARK_MODEL_PATH):
+    """Exports the Dense layers of a trained Keras landmark classifier for the numpy runtime."""
+    weights = {}
+    dense_layers = [layer for layer in model.layers if layer.get_weights()]
+    for i, layer in enumerate(dense_layers):
+        kernel, bias = layer.get_weights()
+        weights[f'kernel_{i}'] = kernel
+        weights[f'bias_{i}'] = bias
+    np.savez(path, layers=len(dense_layers), **weights)
+    print(f"Landmark classifier saved to {path}")
+
+class LandmarkClassifier:
+    """
+    Numpy runtime of the landmark classifier: ReLU hidden layers and a softmax output.
+    Stateless and read-only, so one instance is shared by every stream. Exposes the
+    same `predict`/`predict_batch`/`version` interface as the frame model backends.
+    """
+
+    def __init__(self, path=LANDMARK_MODEL_PATH, version=LANDMARK_MODEL_VERSION):
+        weights = np.load(path)
+        self.layers = [(weights[f'kernel_{i}'].astype(np.float32), weights[f'bias_{i}'].astype(np.float32))
+                       for i in range(int(weights['layers']))]
+        self.version = version
+        if self.layers[-1][0].shape[1] != len(LABELS):
+            raise ValueError(f"Landmark model has {self.layers[-1][0].shape[1]} classes, expected {len(LABELS)}")
+
+    def predict_batch(self, features):
+        """Returns the (batch_size, num_classes) class probabilities of feature vectors."""
+        activations = np.asarray(features, dtype=np.float32).reshape(-1, FEATURE_SIZE)
+        for kernel, bias in self.layers[:-1]:
+            activations = np.maximum(activations @ kernel + bias, 0)
+        kernel, bias = self.layers[-1]
+        logits = activations @ kernel + bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def predict(self, features):
+        """Returns the (1, num_classes) class probabilities of one feature vector."""
+        return self.predict_batch(features)
+
+def load_landmark_classifier(path=LANDMARK_MODEL_PATH):
+    """Loads the landmark classifier, returning None if it is missing or MediaPipe is not installed."""
+    try:
+        import mediapipe  # noqa: F401
+    except ImportError:
+        print("MediaPipe is not installed; install it with `pip install mediapipe` to use landmark mode.")
+        return None
+    try:
+        classifier = LandmarkClassifier(path)
+        print(f"Landmark classifier loaded successfully from {path}")
+        return classifier
+    except Exception as e:
+        print(f"Error loading landmark classifier: {e}")
+        print("Train one with `python train_landmark_model.py`.")
+        return None
@@ -0,0 +1,228 @@
+"""
+Lightweight in-process metrics with a Prometheus text endpoint.
+
+Counters, gauges and histograms are plain Python objects guarded by a lock, so
+recording a value costs about a microsecond and needs no extra dependency.
+`start_metrics_server` serves every registered metric at
+http://<host>:METRICS_PORT/metrics from a daemon thread, in the Prometheus text
+exposition format, so the live interpreter can be scraped or simply curled while
+load testing to find how many streams one node can carry.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Port of the metrics endpoint; 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9100))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Latency buckets in seconds, from 0.1 ms to 2.5 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def labels(self, *values):
+        """Returns the child metric for one combination of label values."""
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        # Unlabelled metrics record into a single child
+        return self.labels()
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.samples(self.name, self.labelnames, values))
+        return lines
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = float(value)
+
+    def samples(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {self.value}"]
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. frames processed."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. queue depth or active streams."""
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default().dec(amount)
+
+    def set(self, value):
+        self._default().set(value)
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            bucket_labels = _format_labels(labelnames, values, ['le="%s"' % bound])
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        cumulative += self.counts[-1]
+        bucket_labels = _format_labels(labelnames, values, ['le="+Inf"'])
+        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {self.sum}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {cumulative}")
+        return lines
+
+class Histogram(_Metric):
+    """Distribution of observed values, e.g. latencies, in cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        """Context manager that observes the duration of its block in seconds."""
+        return self._default().time()
+
+def render():
+    """Returns every registered metric in the Prometheus text format."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are frequent; keep them out of the app's output
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Starts the metrics endpoint on a daemon thread, once per process. Returns the server or None."""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"Could not start the metrics endpoint on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            print(f"Metrics available at http://{host}:{port}/metrics")
+    return _server
+
+# Live interpreter
+FRAMES = Counter("sign_frames_total", "Video frames received by the interpreter", ["mode"])
+FRAMES_SKIPPED = Counter("sign_frames_skipped_total", "Frames not sent to the model", ["reason"])
+ACTIVE_STREAMS = Gauge("sign_active_streams", "Interpreter video streams currently open", ["mode"])
+PREPROCESS_SECONDS = Histogram("sign_preprocess_seconds", "Time to crop and normalize a frame")
+INFERENCE_SECONDS = Histogram("sign_inference_seconds", "Time from submitting a frame to receiving its prediction", ["mode"])
+STABILIZE_SECONDS = Histogram("sign_stabilize_seconds", "Time spent in the letter vote and word decoder per frame")
+LETTERS_ACCEPTED = Counter("sign_letters_accepted_total", "Letters accepted by the stabilizer")
+
+# Batching inference worker
+INFERENCE_BATCH_SIZE = Histogram("sign_inference_batch_size", "Frames per model forward pass",
+                                 buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+INFERENCE_QUEUE_DEPTH = Gauge("sign_inference_queue_depth", "Frames waiting for the batching worker")
+INFERENCE_BATCH_SECONDS = Histogram("sign_inference_batch_seconds", "Duration of one batched forward pass")
+
+# Prediction log writer
+DB_LOG_QUEUE_DEPTH = Gauge("db_prediction_log_queue_depth", "Prediction logs waiting to be written")
+DB_LOG_ROWS = Counter("db_prediction_log_rows_total", "Prediction log rows by outcome", ["status"])
+DB_LOG_WRITE_SECONDS = Histogram("db_prediction_log_write_seconds", "Duration of one batched prediction log insert")
+
+# Text to speech
+TTS_UTTERANCES = Counter("tts_utterances_total", "Utterances spoken, by whether they came from the WAV cache", ["source"])
+TTS_DROPPED = Counter("tts_utterances_dropped_total", "Utterances dropped because the TTS queue was full")
+TTS_QUEUE_DEPTH = Gauge("tts_queue_depth", "Utterances waiting to be spoken")
+TTS_SPEAK_SECONDS = Histogram("tts_speak_seconds", "Time to speak one utterance")
@@ -1,6 +1,43 @@
+import json
+import os
+import threading
+
 import cv2
 import numpy as np
-import tensorflow as tf
+
+# Inference backend used by the live interpreter: 'tflite' or 'keras'
+MODEL_BACKEND = os.getenv("SIGN_MODEL_BACKEND", "tflite")
+MODEL_PATHS = {
+    'keras': 'sign_model.h5',
+    'tflite': 'sign_model.tflite',
+}
+
+# Exported model variants (float32/float16/int8 TFLite) and their measured size, accuracy and latency.
+# SIGN_MODEL_VARIANT selects one of them by name; without it the backend defaults above are used.
+MODEL_REGISTRY_PATH = 'model_registry.json'
+MODEL_VARIANT = os.getenv("SIGN_MODEL_VARIANT")
+# Version prefix of the base model; the backend and precision are appended to it
+DEFAULT_MODEL_VERSION = 'v1.0-64x64'
+
+# Class index to letter, in the order the model was trained on
+LABELS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Change-detection gate: mean absolute pixel difference (0-1 scale) below which a frame
+# counts as unchanged, and the most consecutive frames that may reuse a prediction
+GATE_DIFF_THRESHOLD = float(os.getenv("SIGN_GATE_DIFF_THRESHOLD", 0.02))
+GATE_MAX_SKIP = int(os.getenv("SIGN_GATE_MAX_SKIP", 10))
+
+def _tflite_interpreter_class():
+    """
+    Returns the TFLite Interpreter class. The standalone tflite_runtime package is
+    preferred because importing it is far faster than importing all of TensorFlow.
+    """
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
 
 def load_sign_model(model_path='sign_model.h5'):
     """
@@ -11,6 +48,8 @@ def load_sign_model(model_path='sign_model.h5'):
         A loaded Keras model object
     """
     try:
+        # TensorFlow is imported on first use, it dominates the app's cold start
+        import tensorflow as tf
         model = tf.keras.models.load_model(model_path)
         print(f"Model loaded successfully from {model_path}")
         return model
@@ -19,55 +58,375 @@ def load_sign_model(model_path='sign_model.h5'):
         print("Please ensure 'sign_model.h5' is in the correct directory and is a valid Keras model.")
         return None
 
-def preprocess_image(frame, target_size=(64, 64)):
+class KerasBackend:
     """
-    Preprocesses a single frame from the webcam for model prediction.
-    This function implements a Region of Interest (ROI) to isolate the hand.
+    Runs inference on a loaded Keras model with a preallocated input tensor.
+    Calling the model directly avoids the per-call overhead of `model.predict`,
+    which is built for large batches rather than a single webcam frame.
+    """
+    name = 'keras'
 
-    Args:
-        frame (numpy.ndarray): The raw BGR frame from OpenCV.
-        target_size (tuple): The target image size (width, height) for the model.
+    def __init__(self, model, version=DEFAULT_MODEL_VERSION):
+        self.model = model
+        self.version = version
+        self.input_shape = (1,) + tuple(model.input_shape[1:])
+        self._input = np.zeros(self.input_shape, dtype=np.float32)
+        # Batch input, grown to the largest batch seen so far
+        self._batch = None
+        self._lock = threading.Lock()
+
+    @property
+    def target_size(self):
+        """(width, height) the frames must be preprocessed to, as `FramePreprocessor` takes it."""
+        return self.input_shape[2], self.input_shape[1]
+
+    def predict(self, processed_img):
+        """
+        Classifies a single preprocessed frame.
+        Args:
+            processed_img (numpy.ndarray): Output of `preprocess_image`. Single channel
+                images are broadcast across the model's channels.
+        Returns:
+            numpy.ndarray: The class probabilities for the frame.
+        """
+        with self._lock:
+            np.copyto(self._input, processed_img, casting='unsafe')
+            return self.model(self._input, training=False).numpy()[0]
+
+    def predict_batch(self, images):
+        """
+        Classifies a batch of preprocessed frames in one forward pass.
+        Args:
+            images (numpy.ndarray): Array of shape (batch, height, width, channels). Single
+                channel images are broadcast across the model's channels.
+        Returns:
+            numpy.ndarray: The class probabilities, one row per frame.
+        """
+        batch_size = len(images)
+        with self._lock:
+            if self._batch is None or len(self._batch) < batch_size:
+                self._batch = np.zeros((batch_size,) + self.input_shape[1:], dtype=np.float32)
+            np.copyto(self._batch[:batch_size], images, casting='unsafe')
+            return self.model(self._batch[:batch_size], training=False).numpy()
+
+class TFLiteBackend:
+    """
+    Runs inference through the TFLite interpreter exported by train_model.py.
+    The input tensor is allocated once and reused for every frame.
+    """
+    name = 'tflite'
+
+    def __init__(self, model_path, num_threads=None, version=DEFAULT_MODEL_VERSION):
+        self.model_path = model_path
+        self.version = version
+        self.num_threads = num_threads
+        self._interpreter_class = _tflite_interpreter_class()
+        self.interpreter = self._interpreter_class(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self._input_index = input_details['index']
+        self._output_index = output_details['index']
+        self.input_shape = tuple(input_details['shape'])
+        self._input = np.zeros(self.input_shape, dtype=input_details['dtype'])
+        # Quantization parameters, set for full-int8 models only
+        self._input_quantization = self._quantization(input_details)
+        self._output_quantization = self._quantization(output_details)
+        # One resized interpreter per power-of-two batch size, created on first use
+        self._batch_slots = {1: (self.interpreter, self._input)}
+        # The interpreter is not thread-safe and is shared between webrtc sessions
+        self._lock = threading.Lock()
+
+    @property
+    def target_size(self):
+        """(width, height) the frames must be preprocessed to, as `FramePreprocessor` takes it."""
+        return self.input_shape[2], self.input_shape[1]
+
+    @staticmethod
+    def _quantization(details):
+        scale, zero_point = details['quantization']
+        return (scale, zero_point) if scale else None
+
+    def _quantize(self, images):
+        """Maps float images onto the integer input of a quantized model."""
+        if self._input_quantization is None:
+            return images
+        scale, zero_point = self._input_quantization
+        limits = np.iinfo(self._input.dtype)
+        return np.clip(np.round(images / scale + zero_point), limits.min, limits.max)
+
+    def _dequantize(self, output):
+        """Maps the integer output of a quantized model back to probabilities."""
+        if self._output_quantization is None:
+            return output.copy()
+        scale, zero_point = self._output_quantization
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def _batch_slot(self, batch_size):
+        """Returns the (interpreter, input tensor) pair for the smallest bucket holding batch_size."""
+        bucket = 1
+        while bucket < batch_size:
+            bucket *= 2
+        if bucket not in self._batch_slots:
+            interpreter = self._interpreter_class(model_path=self.model_path, num_threads=self.num_threads)
+            interpreter.resize_tensor_input(self._input_index, (bucket,) + self.input_shape[1:])
+            interpreter.allocate_tensors()
+            self._batch_slots[bucket] = (interpreter, np.zeros((bucket,) + self.input_shape[1:], dtype=self._input.dtype))
+        return self._batch_slots[bucket]
+
+    def _run(self, interpreter, input_tensor):
+        interpreter.set_tensor(self._input_index, input_tensor)
+        interpreter.invoke()
+        return interpreter.get_tensor(self._output_index)
+
+    def predict(self, processed_img):
+        """
+        Classifies a single preprocessed frame.
+        Args:
+            processed_img (numpy.ndarray): Output of `preprocess_image`. Single channel
+                images are broadcast across the model's channels.
+        Returns:
+            numpy.ndarray: The class probabilities for the frame.
+        """
+        with self._lock:
+            np.copyto(self._input, self._quantize(processed_img), casting='unsafe')
+            return self._dequantize(self._run(self.interpreter, self._input)[0])
+
+    def predict_batch(self, images):
+        """
+        Classifies a batch of preprocessed frames in one forward pass.
+        Args:
+            images (numpy.ndarray): Array of shape (batch, height, width, channels).
+        Returns:
+            numpy.ndarray: The class probabilities, one row per frame.
+        """
+        batch_size = len(images)
+        with self._lock:
+            interpreter, input_tensor = self._batch_slot(batch_size)
+            np.copyto(input_tensor[:batch_size], self._quantize(images), casting='unsafe')
+            return self._dequantize(self._run(interpreter, input_tensor)[:batch_size])
+
+def load_model_registry(path=MODEL_REGISTRY_PATH):
+    """Reads the model variant registry written by export_model.py."""
+    if not os.path.exists(path):
+        return {'variants': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_model_registry(registry, path=MODEL_REGISTRY_PATH):
+    with open(path, 'w') as f:
+        json.dump(registry, f, indent=2)
+
+def _model_version(backend, model_path, registry):
+    """
+    Names the model a backend runs, so prediction logs tell backends and precisions apart.
+    A registered TFLite file keeps its registry version; other files are float32.
+    """
+    if backend == 'tflite':
+        for entry in registry['variants'].values():
+            if os.path.normpath(entry['path']) == os.path.normpath(model_path):
+                return entry['version']
+        return f"{DEFAULT_MODEL_VERSION}-float32"
+    return f"{DEFAULT_MODEL_VERSION}-{backend}-float32"
 
+def load_inference_backend(backend=None, model_path=None, variant=None):
+    """
+    Loads the inference backend used by the live interpreter.
+    Args:
+        backend (str): 'tflite' or 'keras'. Defaults to the SIGN_MODEL_BACKEND env variable.
+        model_path (str): Path to the model file. Defaults to the backend's standard file.
+        variant (str): Name of a registered model variant, e.g. 'int8'. Defaults to the
+            SIGN_MODEL_VARIANT env variable. Overrides backend and model_path.
     Returns:
-        tuple: A tuple containing:
-            - preprocessed_img (numpy.ndarray): The final image ready for model input.
-            - display_img (numpy.ndarray): The original frame with ROI box drawn on it.
+        A backend object exposing `predict(processed_img)` and the `version` it runs,
+        or None if loading failed.
+    """
+    variant = variant or MODEL_VARIANT
+    version = None
+    registry = load_model_registry()
+    if variant:
+        entry = registry['variants'].get(variant)
+        if entry is None:
+            raise ValueError(f"Unknown model variant '{variant}'. Run export_model.py to register it.")
+        backend, model_path, version = 'tflite', entry['path'], entry['version']
+
+    backend = (backend or MODEL_BACKEND).lower()
+    if backend not in MODEL_PATHS:
+        raise ValueError(f"Unknown inference backend '{backend}'. Expected one of {list(MODEL_PATHS)}.")
+    model_path = model_path or MODEL_PATHS[backend]
+    if version is None:
+        version = _model_version(backend, model_path, registry)
+
+    if backend == 'keras':
+        model = load_sign_model(model_path)
+        if model is None:
+            return None
+        inference_backend = KerasBackend(model, version=version)
+    else:
+        try:
+            inference_backend = TFLiteBackend(model_path, version=version)
+            print(f"TFLite model loaded successfully from {model_path}")
+        except Exception as e:
+            print(f"Error loading TFLite model: {e}")
+            print("Please ensure 'sign_model.tflite' exists. It is exported at the end of train_model.py.")
+            return None
+    check_input_contract(inference_backend, model_path)
+    return inference_backend
+
+def check_input_contract(backend, model_path):
+    """
+    Raises ValueError if a model cannot take the frames `FramePreprocessor` produces:
+    a batch of grayscale images at the model's own height and width, with one channel
+    or three (the grayscale is broadcast).
+    """
+    shape = tuple(backend.input_shape)
+    if len(shape) != 4 or shape[3] not in (1, 3) or min(shape[1:3]) < 1:
+        raise ValueError(f"Model {model_path} expects input of shape {shape}, but the recognition pipeline "
+                         f"produces (batch, height, width, 1 or 3) grayscale frames. Re-export it with "
+                         f"train_model.py or export_model.py.")
+
+class FrameChangeGate:
+    """
+    Skips inference for frames where the hand in the ROI has not moved.
+    Each preprocessed frame is compared against the last frame that was actually
+    classified; while the mean pixel difference stays below `threshold` the previous
+    prediction is reused, for at most `max_skip` frames in a row.
     """
 
-    # 1. Define and draw the Region of Interest (ROI)
-    h, w, _ = frame.shape
+    def __init__(self, threshold=GATE_DIFF_THRESHOLD, max_skip=GATE_MAX_SKIP):
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.last_prediction = None
+        self._reference = None
+        self._diff = None
+        self._skipped = 0
 
-    # Define a square ROI in the center of the frame
-    # This guides the user to place their hand in predictable location.
-    roi_size = 300
-    x1 = int((w - roi_size) / 2)
-    y1 = int((h - roi_size) / 2)
-    x2 = x1 + roi_size
-    y2 = y1 + roi_size
+    def should_infer(self, processed_img):
+        """
+        Checks whether a frame needs to go through the model.
+        Args:
+            processed_img (numpy.ndarray): Output of `preprocess_image`.
+        Returns:
+            bool: False if `last_prediction` can be reused for this frame.
+        """
+        if self._reference is None or self._skipped >= self.max_skip:
+            return True
 
-    # Create a copy of the frame to draw on for display
-    display_img = frame.copy()
-    cv2.rectangle(display_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        # Compare the 64x64 grayscale signature without allocating new arrays
+        signature = processed_img.reshape(self._reference.shape)
+        np.subtract(signature, self._reference, out=self._diff)
+        np.abs(self._diff, out=self._diff)
+        if self._diff.mean() >= self.threshold:
+            return True
 
-    # 2. Extract and process the ROI
-    # Crop the frame to the defined ROI
-    roi = frame[y1:y2, x1:x2]
+        self._skipped += 1
+        return False
+
+    def update(self, processed_img, prediction):
+        """Records the frame that was just classified and its prediction."""
+        signature = processed_img.reshape(processed_img.shape[-3:-1])
+        if self._reference is None or self._reference.shape != signature.shape:
+            self._reference = np.empty(signature.shape, dtype=np.float32)
+            self._diff = np.empty(signature.shape, dtype=np.float32)
+        np.copyto(self._reference, signature, casting='unsafe')
+        self.last_prediction = prediction
+        self._skipped = 0
+
+class FramePreprocessor:
+    """
+    Reusable, allocation-free version of `preprocess_image`.
+    The grayscale, blurred and resized images and the float32 model input are
+    preallocated once and written with OpenCV's `dst=` arguments on every frame.
+    The returned arrays are owned by the preprocessor and are overwritten by the
+    next call, so copy them if they must outlive the current frame.
+    """
 
-    # Convert the ROI to grayscale, as color is often not critical for sign shape
-    gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    def __init__(self, target_size=(64, 64), roi_size=300):
+        self.target_size = target_size
+        self.roi_size = roi_size
+        width, height = target_size
+        self.box = None
+        self._roi = None
+        self._gray = None
+        self._blurred = None
+        self._display = None
+        self.resized = np.empty((height, width), dtype=np.uint8)
+        # Model input shape: (batch_size, height, width, channels)
+        self.tensor = np.empty((1, height, width, 1), dtype=np.float32)
+        self._scale = np.float32(1.0 / 255.0)
 
-    # Apply a Gaussian Blur to reduce noise and improve model generalization
-    blurred_roi = cv2.GaussianBlur(gray_roi, (5, 5), 0)
+    def __call__(self, frame, copy_display=False, box=None):
+        """
+        Preprocesses a single frame from the webcam for model prediction.
+        Args:
+            frame (numpy.ndarray): The raw BGR frame from OpenCV.
+            copy_display (bool): Draw the ROI box on a copy of the frame instead of
+                on the frame itself. Only needed when the caller still uses the raw frame.
+            box (tuple): Optional square (x1, y1, x2, y2) hand box, e.g. from a
+                `HandTracker`. Defaults to the fixed ROI at the frame centre.
+        Returns:
+            tuple: (preprocessed_img, display_img), as returned by `preprocess_image`.
+        """
+        # 1. Define the Region of Interest (ROI)
+        h, w, _ = frame.shape
 
-    # Resize the processed ROI to the size your model expects
-    resized_img = cv2.resize(blurred_roi, target_size)
+        if box is None:
+            # Define a square ROI in the center of the frame
+            # This guides the user to place their hand in predictable location.
+            x1 = int((w - self.roi_size) / 2)
+            y1 = int((h - self.roi_size) / 2)
+            x2 = x1 + self.roi_size
+            y2 = y1 + self.roi_size
+        else:
+            x1, y1, x2, y2 = box
+        # Kept for callers that draw or report the ROI themselves
+        self.box = (x1, y1, x2, y2)
 
-    # 3. Normalize and Reshape for model input
-    # Normalize pixel values to be between 0 and 1
-    normalized_img = resized_img / 255.0
+        # 2. Extract and process the ROI
+        # Cropping is a view into the frame, not a copy
+        roi = frame[y1:y2, x1:x2]
+        if box is not None and roi.shape[:2] != (self.roi_size, self.roi_size):
+            # Tracked boxes change size every frame; scale them to the ROI size so the buffers stay fixed
+            if self._roi is None:
+                self._roi = np.empty((self.roi_size, self.roi_size, 3), dtype=np.uint8)
+            cv2.resize(roi, (self.roi_size, self.roi_size), dst=self._roi)
+            roi = self._roi
+        if self._gray is None or self._gray.shape != roi.shape[:2]:
+            self._gray = np.empty(roi.shape[:2], dtype=np.uint8)
+            self._blurred = np.empty(roi.shape[:2], dtype=np.uint8)
 
-    # Reshape the image to match the model's expected input shape:
-    # (1, height, width, 1) -> (batch_size, height, width, channels)
-    preprocessed_img = np.expand_dims(np.expand_dims(normalized_img, axis=-1), axis=0)
+        cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.GaussianBlur(self._gray, (5, 5), 0, dst=self._blurred)
+        cv2.resize(self._blurred, self.target_size, dst=self.resized)
 
-    return preprocessed_img, display_img
\ No newline at end of file
+        # 3. Normalize straight into the float32 model input
+        np.multiply(self.resized, self._scale, out=self.tensor[0, :, :, 0], dtype=np.float32)
+
+        # 4. Draw the ROI box last so it never leaks into the model input
+        if copy_display:
+            if self._display is None or self._display.shape != frame.shape:
+                self._display = np.empty_like(frame)
+            np.copyto(self._display, frame)
+            display_img = self._display
+        else:
+            display_img = frame
+        cv2.rectangle(display_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+        return self.tensor, display_img
+
+def preprocess_image(frame, target_size=(64, 64)):
+    """
+    Preprocesses a single frame from the webcam for model prediction.
+    This function implements a Region of Interest (ROI) to isolate the hand.
+    For per-frame use in a loop, prefer a long-lived `FramePreprocessor`.
+
+    Args:
+        frame (numpy.ndarray): The raw BGR frame from OpenCV.
+        target_size (tuple): The target image size (width, height) for the model.
+
+    Returns:
+        tuple: A tuple containing:
+            - preprocessed_img (numpy.ndarray): The final image ready for model input.
+            - display_img (numpy.ndarray): The original frame with ROI box drawn on it.
+    """
+    return FramePreprocessor(target_size)(frame, copy_display=True)
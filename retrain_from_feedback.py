@@ -0,0 +1,142 @@
+"""
+Incremental retraining on user corrections.
+
+Pulls unprocessed rows from model_feedback joined to the ROI crop logged with each
+prediction, in keyset-paginated pages. It then fine-tunes the latest fine-tuned model
+in the registry (the base model on the first run), so corrections accumulate across
+runs, mixing in a replay sample of the original training data so the model does not
+forget it. The result is exported as new registered TFLite variants, and the
+feedback rows are marked processed in bulk once the export succeeded.
+
+Usage:
+    python retrain_from_feedback.py
+    python retrain_from_feedback.py --min-samples 200 --epochs 5
+"""
+import argparse
+import logging
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+import tensorflow as tf
+
+import tidb as db
+from export_model import export_variants
+from model import DEFAULT_MODEL_VERSION, LABELS, load_model_registry, load_sign_model
+from train_model import INPUT_SHAPE, NUM_CLASSES, build_datasets, convert_csv_to_shard, TRAIN_CSV
+
+CROP_SIZE = 64
+BASE_MODEL_PATH = 'sign_model.h5'
+
+def collect_feedback(page_size=500):
+    """
+    Reads every unprocessed correction, one keyset page at a time.
+    Returns:
+        tuple: (crops, labels, feedback_ids). Corrections without a logged crop are
+            not trainable but are still returned in feedback_ids so they get marked.
+    """
+    crops, labels, feedback_ids = [], [], []
+    after_id = 0
+    while True:
+        page = db.fetch_unprocessed_feedback(after_id=after_id, limit=page_size)
+        if page is None:
+            raise SystemExit("Could not read feedback from TiDB.")
+        if not page:
+            break
+        for row in page:
+            feedback_ids.append(row['feedback_id'])
+            crop = row['roi_crop']
+            sign = (row['correct_sign'] or '').upper()
+            # Crops are square at the input size of the model that logged them
+            side = math.isqrt(len(crop)) if crop else 0
+            if side and side * side == len(crop) and sign in LABELS:
+                image = np.frombuffer(crop, dtype=np.uint8).reshape(side, side)
+                if side != CROP_SIZE:
+                    image = cv2.resize(image, (CROP_SIZE, CROP_SIZE), interpolation=cv2.INTER_AREA)
+                crops.append(image.reshape(CROP_SIZE, CROP_SIZE, 1))
+                labels.append(LABELS.index(sign))
+        after_id = page[-1]['feedback_id']
+        print(f"Read {len(feedback_ids)} feedback rows so far...")
+    return crops, labels, feedback_ids
+
+def to_training_arrays(crops, labels, input_shape=INPUT_SHAPE):
+    """Converts logged grayscale crops, scaled to CROP_SIZE, to normalized model inputs."""
+    height, width, channels = input_shape
+    images = tf.image.resize(np.stack(crops).astype(np.float32) / 255.0, (height, width)).numpy()
+    if channels != 1:
+        images = np.repeat(images, channels, axis=-1)
+    return images, tf.keras.utils.to_categorical(labels, num_classes=NUM_CLASSES)
+
+def replay_sample(size, input_shape=INPUT_SHAPE, seed=0):
+    """Draws a random sample of the original training rows to mix into fine-tuning."""
+    images_path, labels_path = convert_csv_to_shard(TRAIN_CSV)
+    images = np.load(images_path, mmap_mode='r')
+    labels = np.load(labels_path, mmap_mode='r')
+    indices = np.sort(np.random.default_rng(seed).choice(len(labels), size=min(size, len(labels)), replace=False))
+    height, width, channels = input_shape
+    sample = tf.image.resize(np.asarray(images[indices], dtype=np.float32) / 255.0, (height, width)).numpy()
+    if channels != 1:
+        sample = np.repeat(sample, channels, axis=-1)
+    return sample, tf.keras.utils.to_categorical(np.asarray(labels[indices]), num_classes=NUM_CLASSES)
+
+def current_model_path():
+    """
+    Returns the Keras model the next fine-tune starts from: the most recently exported
+    fine-tuned model, or the base model if there is none. Feedback is marked processed
+    once it is trained into a model, so starting anywhere else would drop corrections.
+    """
+    fine_tuned = [entry for name, entry in load_model_registry()['variants'].items()
+                  if name.startswith('ft-') and entry.get('keras_path') and os.path.exists(entry['keras_path'])]
+    if not fine_tuned:
+        return BASE_MODEL_PATH
+    return max(fine_tuned, key=lambda entry: entry['exported_at'])['keras_path']
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Fine-tune the sign model on user corrections.")
+    parser.add_argument('--model', default=None, help="Model to fine-tune. Defaults to the latest fine-tuned model")
+    parser.add_argument('--min-samples', type=int, default=50, help="Skip retraining below this many usable corrections")
+    parser.add_argument('--replay-ratio', type=float, default=4.0, help="Original training rows mixed in per correction")
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--learning-rate', type=float, default=1e-4)
+    parser.add_argument('--page-size', type=int, default=500)
+    args = parser.parse_args()
+
+    crops, labels, feedback_ids = collect_feedback(page_size=args.page_size)
+    print(f"{len(crops)} usable corrections out of {len(feedback_ids)} unprocessed feedback rows.")
+    if len(crops) < args.min_samples:
+        print("Not enough corrections to retrain yet.")
+        return
+
+    # Fine-tune from the saved weights rather than retraining from scratch
+    model_path = args.model or current_model_path()
+    print(f"Fine-tuning {model_path}")
+    model = load_sign_model(model_path)
+    if model is None:
+        raise SystemExit(1)
+    input_shape = tuple(model.input_shape[1:])
+    feedback_x, feedback_y = to_training_arrays(crops, labels, input_shape)
+    replay_x, replay_y = replay_sample(int(len(crops) * args.replay_ratio), input_shape)
+    X = np.concatenate([feedback_x, replay_x])
+    y = np.concatenate([feedback_y, replay_y])
+
+    _, test_ds, _ = build_datasets(input_shape=input_shape)
+    model.compile(optimizer=tf.keras.optimizers.Adam(args.learning_rate), loss='categorical_crossentropy', metrics=['accuracy'])
+    _, acc_before = model.evaluate(test_ds, verbose=0)
+    model.fit(X, y, epochs=args.epochs, batch_size=32, shuffle=True)
+    _, acc_after = model.evaluate(test_ds, verbose=0)
+    print(f"Test accuracy before: {acc_before*100:.2f}%, after: {acc_after*100:.2f}%")
+
+    # Export as a new registered variant; the app switches to it through SIGN_MODEL_VARIANT
+    stamp = time.strftime('%Y%m%d%H%M')
+    output_prefix = f"sign_model_ft_{stamp}"
+    model.save(f"{output_prefix}.h5")
+    export_variants(model, version=f"{DEFAULT_MODEL_VERSION}-ft{stamp}", output_prefix=output_prefix,
+                    name_prefix=f"ft-{stamp}-", keras_path=f"{output_prefix}.h5")
+
+    db.mark_feedback_processed(feedback_ids)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Streaming speech recognition for the Voice to Sign mode.
+
+Audio is fed to a recognizer backend as chunks of 16-bit mono PCM, from the
+microphone or from a WAV file, and transcripts are yielded as (text, is_final)
+pairs while decoding runs. The offline Vosk backend decodes each chunk as it
+arrives and emits partial transcripts; the Google backend needs the whole
+utterance and a network connection, and is kept as a fallback.
+
+Usage:
+    python speech.py recording.wav
+    python speech.py recording.wav --backend google
+"""
+import argparse
+import json
+import os
+import wave
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "vosk" (offline, streaming) or "google" (online, whole utterance)
+SPEECH_BACKEND = os.getenv("SPEECH_BACKEND", "vosk")
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-en-us-0.15")
+SAMPLE_RATE = 16000
+# 0.25 s of audio per chunk
+CHUNK_FRAMES = 4000
+
+class SpeechRecognitionError(Exception):
+    """Raised when a recognizer backend cannot be reached."""
+
+class VoskRecognizer:
+    """
+    Offline streaming recognizer.
+    The acoustic model is loaded once and shared; every stream gets its own
+    lightweight KaldiRecognizer.
+    """
+    name = "vosk"
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+
+    def stream(self, chunks, sample_rate=SAMPLE_RATE):
+        """
+        Decodes audio chunk by chunk.
+        Yields:
+            tuple: (text, is_final). Partial transcripts may still change; a final
+                one ends a phrase, and the next partial starts a new phrase.
+        """
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(self.model, sample_rate)
+        last_partial = ""
+        for chunk in chunks:
+            if recognizer.AcceptWaveform(chunk):
+                text = json.loads(recognizer.Result()).get("text", "")
+                last_partial = ""
+                if text:
+                    yield text, True
+            else:
+                partial = json.loads(recognizer.PartialResult()).get("partial", "")
+                if partial and partial != last_partial:
+                    last_partial = partial
+                    yield partial, False
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if text:
+            yield text, True
+
+class GoogleRecognizer:
+    """Google Web Speech recognizer. Decodes the whole utterance once the audio ends."""
+    name = "google"
+
+    def stream(self, chunks, sample_rate=SAMPLE_RATE):
+        import speech_recognition as sr
+        audio = sr.AudioData(b"".join(chunks), sample_rate, 2)
+        try:
+            text = sr.Recognizer().recognize_google(audio)
+        except sr.UnknownValueError:
+            return
+        except sr.RequestError as e:
+            raise SpeechRecognitionError(f"Could not request results from Google service; {e}") from e
+        if text:
+            yield text, True
+
+def load_recognizer(backend=None):
+    """
+    Loads the configured recognizer backend.
+    Falls back to Google when Vosk or its model is not available.
+    """
+    backend = backend or SPEECH_BACKEND
+    if backend == "vosk":
+        try:
+            recognizer = VoskRecognizer()
+            print(f"Vosk speech model loaded from {VOSK_MODEL_PATH}")
+            return recognizer
+        except Exception as e:
+            print(f"Error loading Vosk speech model: {e}")
+            print("Falling back to Google speech recognition.")
+    return GoogleRecognizer()
+
+def wav_chunks(source, chunk_frames=CHUNK_FRAMES):
+    """
+    Reads a WAV file or file-like object of 16-bit mono PCM.
+    Returns:
+        tuple: (sample_rate, iterator of PCM chunks)
+    """
+    wav = wave.open(source, "rb")
+    if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+        wav.close()
+        raise ValueError("Audio must be 16-bit mono PCM WAV.")
+
+    def chunks():
+        with wav:
+            while True:
+                data = wav.readframes(chunk_frames)
+                if not data:
+                    return
+                yield data
+
+    return wav.getframerate(), chunks()
+
+def microphone_chunks(sample_rate=SAMPLE_RATE, chunk_frames=CHUNK_FRAMES, timeout=5.0, phrase_time_limit=10.0,
+                      silence_seconds=1.0, silence_threshold=500):
+    """
+    Streams PCM chunks from the default microphone.
+    Stops when no speech starts within `timeout` seconds, after `silence_seconds`
+    of silence following speech, or after `phrase_time_limit` seconds of audio.
+    """
+    import speech_recognition as sr
+    chunk_seconds = chunk_frames / sample_rate
+    with sr.Microphone(sample_rate=sample_rate, chunk_size=chunk_frames) as source:
+        heard_speech = False
+        silent = 0.0
+        elapsed = 0.0
+        while elapsed < phrase_time_limit:
+            chunk = source.stream.read(chunk_frames)
+            elapsed += chunk_seconds
+            rms = np.sqrt(np.mean(np.frombuffer(chunk, dtype=np.int16).astype(np.float32) ** 2))
+            if rms >= silence_threshold:
+                heard_speech = True
+                silent = 0.0
+            else:
+                silent += chunk_seconds
+            if heard_speech:
+                yield chunk
+                if silent >= silence_seconds:
+                    return
+            elif elapsed >= timeout:
+                return
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a 16-bit mono WAV file, printing partial results.")
+    parser.add_argument('wav', help="Path of the WAV file")
+    parser.add_argument('--backend', choices=('vosk', 'google'), default=None)
+    args = parser.parse_args()
+
+    recognizer = load_recognizer(args.backend)
+    sample_rate, chunks = wav_chunks(args.wav)
+    for text, is_final in recognizer.stream(chunks, sample_rate):
+        print(f"{'final' if is_final else 'partial'}: {text}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from collections import deque
+
+class LetterStabilizer:
+    """
+    Turns the noisy per-frame letters into a stable letter stream.
+    A letter is accepted once it wins the majority vote over the last `window`
+    predictions, differs from the previously accepted letter and the current
+    frame is confident enough. The vote buffer is cleared after every accepted letter.
+    """
+
+    def __init__(self, window=5, confidence_threshold=0.90):
+        self.buffer = deque(maxlen=window)
+        self.confidence_threshold = confidence_threshold
+        self.last_sign = None
+
+    def update(self, sign, confidence):
+        """
+        Adds one frame's prediction to the vote.
+        Args:
+            sign (str): The predicted letter for the frame.
+            confidence (float): The model's confidence for that letter.
+        Returns:
+            str: The newly accepted letter, or None if nothing was accepted.
+        """
+        self.buffer.append(sign)
+        if len(self.buffer) < self.buffer.maxlen:
+            return None
+
+        stable_sign = max(set(self.buffer), key=self.buffer.count)
+        if stable_sign != self.last_sign and confidence > self.confidence_threshold:
+            self.last_sign = stable_sign
+            self.buffer.clear()
+            return stable_sign
+        return None
+
+    def reset(self):
+        """Forgets the vote buffer and the last accepted letter."""
+        self.buffer.clear()
+        self.last_sign = None
@@ -0,0 +1,143 @@
+"""
+Temporal sequence mode for streaming sign recognition.
+
+The frame CNN is cut at its penultimate Dense layer to produce one embedding per
+frame. A lightweight temporal head (causal 1D convolution, average pooling over a
+rolling window, softmax) classifies the last `window` embeddings, which lets it see
+motion-based letters such as J and Z. At inference the head runs in numpy and is
+updated incrementally: each new frame costs one convolution step and one dense
+layer, never a pass over the whole window.
+"""
+import os
+
+import numpy as np
+
+from model import DEFAULT_MODEL_VERSION, KerasBackend, TFLiteBackend, load_sign_model
+
+TEMPORAL_HEAD_PATH = 'sign_temporal_head.npz'
+EMBEDDING_MODEL_PATH = 'sign_embedding.tflite'
+TEMPORAL_WINDOW = 16
+TEMPORAL_MODEL_VERSION = f"{DEFAULT_MODEL_VERSION}-temporal"
+
+def build_embedding_model(model):
+    """Returns a Keras model mapping a frame to the frame CNN's penultimate layer."""
+    import tensorflow as tf
+    return tf.keras.Model(inputs=model.inputs, outputs=model.layers[-2].output)
+
+def load_embedding_backend(model_path=None):
+    """
+    Loads the per-frame embedding extractor as an inference backend.
+    Uses the exported TFLite embedding model when present, otherwise cuts the Keras model.
+    Returns:
+        A backend exposing `predict` and `predict_batch`, or None if loading failed.
+    """
+    model_path = model_path or (EMBEDDING_MODEL_PATH if os.path.exists(EMBEDDING_MODEL_PATH) else 'sign_model.h5')
+    if model_path.endswith('.tflite'):
+        try:
+            backend = TFLiteBackend(model_path, version=TEMPORAL_MODEL_VERSION)
+            print(f"Embedding model loaded successfully from {model_path}")
+            return backend
+        except Exception as e:
+            print(f"Error loading embedding model: {e}")
+            return None
+
+    model = load_sign_model(model_path)
+    return KerasBackend(build_embedding_model(model), version=TEMPORAL_MODEL_VERSION) if model is not None else None
+
+def build_temporal_model(window=TEMPORAL_WINDOW, embed_dim=128, filters=64, kernel_size=3, num_classes=26):
+    """Builds the trainable Keras version of the temporal head."""
+    import tensorflow as tf
+    from tensorflow.keras import layers
+    return tf.keras.Sequential([
+        layers.Input(shape=(window, embed_dim)),
+        layers.Conv1D(filters, kernel_size, padding='causal', activation='relu'),
+        layers.GlobalAveragePooling1D(),
+        layers.Dense(num_classes, activation='softmax'),
+    ])
+
+def save_temporal_head(model, path=TEMPORAL_HEAD_PATH):
+    """Exports the weights of a trained temporal head for the numpy streaming runtime."""
+    conv, _, dense = model.layers
+    conv_kernel, conv_bias = conv.get_weights()
+    dense_kernel, dense_bias = dense.get_weights()
+    np.savez(path, window=model.input_shape[1], conv_kernel=conv_kernel, conv_bias=conv_bias,
+             dense_kernel=dense_kernel, dense_bias=dense_bias)
+    print(f"Temporal head saved to {path}")
+
+class TemporalHead:
+    """Weights of a trained temporal head, shared by every stream."""
+
+    def __init__(self, path=TEMPORAL_HEAD_PATH):
+        weights = np.load(path)
+        self.window = int(weights['window'])
+        # Conv1D kernel shape: (kernel_size, embed_dim, filters)
+        self.conv_kernel = weights['conv_kernel'].astype(np.float32)
+        self.conv_bias = weights['conv_bias'].astype(np.float32)
+        self.dense_kernel = weights['dense_kernel'].astype(np.float32)
+        self.dense_bias = weights['dense_bias'].astype(np.float32)
+
+def load_temporal_head(path=TEMPORAL_HEAD_PATH):
+    """Loads the temporal head weights, returning None if they are missing or invalid."""
+    try:
+        head = TemporalHead(path)
+        print(f"Temporal head loaded successfully from {path}")
+        return head
+    except Exception as e:
+        print(f"Error loading temporal head: {e}")
+        print("Train one with `python train_temporal.py`.")
+        return None
+
+class StreamingTemporalClassifier:
+    """
+    Per-stream state of the temporal head.
+    Keeps the last `kernel_size` embeddings for the causal convolution and the last
+    `window` convolution outputs with their running sum, so `update` is O(1) in the
+    window length. The output matches the Keras model applied to the most recent
+    window, except that the first convolution steps see real earlier frames where
+    the Keras model sees causal zero padding.
+    """
+
+    def __init__(self, head):
+        self.head = head
+        kernel_size, embed_dim, filters = head.conv_kernel.shape
+        self._embeddings = np.zeros((kernel_size, embed_dim), dtype=np.float32)
+        self._outputs = np.zeros((head.window, filters), dtype=np.float32)
+        self._sum = np.zeros(filters, dtype=np.float32)
+        self._frames = 0
+
+    def update(self, embedding):
+        """
+        Adds one frame's embedding and classifies the current window.
+        Returns:
+            numpy.ndarray: The class probabilities, in the same form as the frame model's.
+        """
+        kernel_size = len(self._embeddings)
+        t = self._frames
+        self._embeddings[t % kernel_size] = np.reshape(embedding, -1)
+
+        # Causal convolution step over the most recent kernel_size embeddings, oldest first
+        order = [(t - kernel_size + 1 + j) % kernel_size for j in range(kernel_size)]
+        conv = np.einsum('kd,kdf->f', self._embeddings[order], self.head.conv_kernel) + self.head.conv_bias
+        np.maximum(conv, 0, out=conv)
+
+        # Rolling average pooling over the window
+        slot = t % self.head.window
+        self._sum += conv - self._outputs[slot]
+        self._outputs[slot] = conv
+        self._frames += 1
+        if slot == self.head.window - 1:
+            # Recompute periodically so float error does not accumulate in the running sum
+            self._sum = self._outputs.sum(axis=0)
+        pooled = self._sum / min(self._frames, self.head.window)
+
+        logits = pooled @ self.head.dense_kernel + self.head.dense_bias
+        logits -= logits.max()
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum()
+
+    def reset(self):
+        """Clears the window, e.g. when the hand leaves the frame."""
+        self._embeddings[:] = 0
+        self._outputs[:] = 0
+        self._sum[:] = 0
+        self._frames = 0
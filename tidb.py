@@ -1,8 +1,17 @@
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from contextlib import contextmanager
+import atexit
 import os
+import queue
+import random
+import threading
+import itertools
+import logging
+import time
 from dotenv import load_dotenv
-import bcrypt
+import auth
+from metrics import DB_LOG_QUEUE_DEPTH, DB_LOG_ROWS, DB_LOG_WRITE_SECONDS
 
 load_dotenv()
 
@@ -13,35 +22,144 @@ DB_PASSWORD = os.getenv("TIDB_PASSWORD")
 DB_NAME = os.getenv("TIDB_DB_NAME")
 DB_SSL_CA = os.getenv("TIDB_SSL_CA")
 
+# Connection pool
+POOL_NAME = "sign_ai_pool"
+POOL_SIZE = int(os.getenv("TIDB_POOL_SIZE", 5))
+POOL_CHECKOUT_TIMEOUT = float(os.getenv("TIDB_POOL_CHECKOUT_TIMEOUT", 10.0))
+# Delay between reconnect attempts of a dead pooled connection, doubling up to the maximum
+RECONNECT_BACKOFF_INITIAL = 0.1
+RECONNECT_BACKOFF_MAX = 2.0
+
+# Days to keep prediction logs; 0 keeps them forever
+PREDICTION_LOG_RETENTION_DAYS = int(os.getenv("PREDICTION_LOG_RETENTION_DAYS", 0))
+
+# Analytics rollups: rows younger than this are left for the next refresh, so
+# transactions still committing with an earlier timestamp are not skipped
+ROLLUP_LAG_SECONDS = int(os.getenv("ROLLUP_LAG_SECONDS", 30))
+
+# Write-behind prediction logging
+LOG_QUEUE_SIZE = int(os.getenv("PREDICTION_LOG_QUEUE_SIZE", 1000))
+LOG_BATCH_SIZE = int(os.getenv("PREDICTION_LOG_BATCH_SIZE", 50))
+LOG_FLUSH_INTERVAL = float(os.getenv("PREDICTION_LOG_FLUSH_INTERVAL", 2.0))
+
+# Per-row log messages are only emitted once every LOG_SAMPLE_EVERY occurrences
+LOG_SAMPLE_EVERY = int(os.getenv("TIDB_LOG_SAMPLE_EVERY", 100))
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+class _LogSampler:
+    """Returns True for one call in every `every`, starting with the first."""
+
+    def __init__(self, every=LOG_SAMPLE_EVERY):
+        self.every = max(1, every)
+        self._calls = itertools.count()
+
+    def __call__(self):
+        return next(self._calls) % self.every == 0
+
+_row_log_sampler = _LogSampler()
+_drop_log_sampler = _LogSampler()
+
+def _connection_args():
+    """Builds the connection arguments shared by single connections and the pool."""
+    conn_args = {
+        'host': DB_HOST,
+        'port': DB_PORT,
+        'user': DB_USER,
+        'password': DB_PASSWORD,
+        'database': DB_NAME
+    }
+    if DB_SSL_CA:
+        conn_args['ssl_ca'] = DB_SSL_CA
+        conn_args['ssl_verify_cert'] = True
+    return conn_args
+
 def get_db_connection():
     """Establishes and returns a connection to the TiDB database."""
     try:
-        # Build connection arguments dynamically
-        conn_args = {
-            'host': DB_HOST,
-            'port': DB_PORT,
-            'user': DB_USER,
-            'password': DB_PASSWORD,
-            'database': DB_NAME
-        }
-        if DB_SSL_CA:
-            conn_args['ssl_ca'] = DB_SSL_CA
-            conn_args['ssl_verify_cert'] = True
-        
-        connection = mysql.connector.connect(**conn_args)
+        connection = mysql.connector.connect(**_connection_args())
         
         if connection.is_connected():
-            print("Successfully connected to TiDB database.")
+            logger.info("Successfully connected to TiDB database.")
             return connection
         
     except Error as e:
-        print(f"Error connection to TiDB: {e}")
+        logger.error(f"Error connection to TiDB: {e}")
         
         if "TiDB_HOST" not in os.environ:
-            print("Make sure .env file is created and `load_dotenv()` is called.")
+            logger.error("Make sure .env file is created and `load_dotenv()` is called.")
             
         return None
     
+def get_connection_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use.
+    Each Streamlit session and background thread checks out its own connection,
+    so database calls run in parallel instead of sharing one socket.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = pooling.MySQLConnectionPool(pool_name=POOL_NAME, pool_size=POOL_SIZE, **_connection_args())
+                logger.info(f"Connection pool to TiDB created with {POOL_SIZE} connections.")
+            except Error as e:
+                logger.error(f"Error creating TiDB connection pool: {e}")
+                if "TIDB_HOST" not in os.environ:
+                    logger.error("Make sure .env file is created and `load_dotenv()` is called.")
+        return _pool
+
+def _checkout(pool, timeout):
+    """Takes a healthy connection from the pool, waiting up to `timeout` seconds for one to free up."""
+    deadline = time.monotonic() + timeout
+    backoff = RECONNECT_BACKOFF_INITIAL
+    while True:
+        try:
+            connection = pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            # Every connection is checked out
+            if time.monotonic() >= deadline:
+                logger.error("Error: timed out waiting for a TiDB connection from the pool.")
+                return None
+            time.sleep(0.05)
+            continue
+
+        try:
+            # Health check, transparently reconnecting connections dropped by the server
+            connection.ping(reconnect=True, attempts=2, delay=0)
+            return connection
+        except Error as e:
+            logger.error(f"Error reconnecting pooled TiDB connection: {e}")
+            try:
+                # Closing a dead connection can fail too; it still goes back to the pool
+                connection.close()
+            except Error:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            # Back off between reconnects so an outage does not turn into a reconnect storm
+            time.sleep(min(backoff, remaining))
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+
+@contextmanager
+def pooled_connection(timeout=POOL_CHECKOUT_TIMEOUT):
+    """
+    Checks a connection out of the pool for the duration of a `with` block.
+    Yields None if the database is unreachable. The connection is returned to the
+    pool when the block exits.
+    """
+    pool = get_connection_pool()
+    connection = _checkout(pool, timeout) if pool else None
+    try:
+        yield connection
+    finally:
+        if connection:
+            connection.close()
+
 def setup_database(connection):
     """
     Creates/verifies all necessary tables: users, prediction_logs, and model_feedback. This new structure links log to registered users. 
@@ -69,6 +187,7 @@ def setup_database(connection):
             predicted_sign CHAR(1) NOT NULL,
             confidence_score FLOAT NOT NULL,
             model_version VARCHAR(50) DEFAULT 'v1.0-64x64',
+            roi_crop BLOB,
             FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
         );            
         """)
@@ -85,106 +204,644 @@ def setup_database(connection):
         );     
         """)
         connection.commit()
-        print("Database tables (users, prediction_logs, model_feedback) verified/created")
+        logger.info("Database tables (users, prediction_logs, model_feedback) verified/created")
     except Error as e:
-        print(f"Error creating tables: {e}")
+        logger.error(f"Error creating tables: {e}")
+        return
     finally:
         cursor.close()
-        
-# User Management Functions
-def register_user(connection, username, password, gender):
-    """Registers a new user with a securely hashed password."""
-    if not connection or not connection.is_connected():
-        return False
-    
-    # Generate a salt and hash the password
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-    
+
+    # CREATE TABLE IF NOT EXISTS never evolves an existing table, migrations do
+    run_migrations(connection)
+
+# Schema migrations, applied in order and recorded in schema_migrations.
+# Every statement is idempotent, so a migration interrupted halfway can simply be re-run.
+MIGRATIONS = [
+    (1, "prediction_logs_roi_crop", [
+        # ROI crop of each logged prediction, used to retrain on user corrections
+        "ALTER TABLE prediction_logs ADD COLUMN IF NOT EXISTS roi_crop BLOB",
+    ]),
+    (2, "prediction_logs_user_session_indexes", [
+        # Per-user and per-session history, feedback joins and analytics
+        "CREATE INDEX IF NOT EXISTS idx_prediction_logs_user_time ON prediction_logs (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_prediction_logs_session_time ON prediction_logs (session_id, timestamp)",
+    ]),
+    (3, "retention_and_feedback_indexes", [
+        # Range deletes by age for log retention
+        "CREATE INDEX IF NOT EXISTS idx_prediction_logs_time ON prediction_logs (timestamp)",
+        # Keyset scan of unprocessed feedback in the retraining job
+        "CREATE INDEX IF NOT EXISTS idx_model_feedback_processed ON model_feedback (is_processed, id)",
+    ]),
+    (4, "analytics_rollups", [
+        # High-water marks of the rows already folded into the rollups
+        """
+        CREATE TABLE IF NOT EXISTS rollup_watermarks (
+            name VARCHAR(50) PRIMARY KEY,
+            last_timestamp TIMESTAMP(3) NOT NULL DEFAULT '1970-01-01 00:00:01.000',
+            last_id BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT IGNORE INTO rollup_watermarks (name) VALUES ('predictions'), ('feedback')",
+        # Anonymous predictions are rolled up under user_id 0
+        """
+        CREATE TABLE IF NOT EXISTS user_letter_stats (
+            user_id BIGINT NOT NULL,
+            letter CHAR(1) NOT NULL,
+            predictions BIGINT NOT NULL DEFAULT 0,
+            corrections BIGINT NOT NULL DEFAULT 0,
+            confidence_sum DOUBLE NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, letter)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_confidence_histogram (
+            user_id BIGINT NOT NULL,
+            bucket TINYINT NOT NULL,
+            predictions BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, bucket)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS session_throughput (
+            session_id VARCHAR(255) PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            predictions BIGINT NOT NULL DEFAULT 0,
+            first_at TIMESTAMP(3) NOT NULL,
+            last_at TIMESTAMP(3) NOT NULL,
+            INDEX idx_session_throughput_user (user_id, last_at)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS confusion_pairs (
+            user_id BIGINT NOT NULL,
+            predicted_sign CHAR(1) NOT NULL,
+            correct_sign CHAR(1) NOT NULL,
+            occurrences BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, predicted_sign, correct_sign)
+        )
+        """,
+    ]),
+]
+
+def run_migrations(connection):
+    """Applies every migration in MIGRATIONS that this database has not recorded yet."""
     cursor = connection.cursor()
     try:
-        sql = "INSERT INTO users (username, password_hash, gender) VALUES (%s, %s, %s)"
-        cursor.execute(sql, (username, hashed_password.decode('utf-8'), gender))
-        connection.commit()
-        print(f"User '{username}' registered successfully.")
-        return True
-    except mysql.connector.IntegrityError:
-        # This error occurs if the username is already taken
-        print(f"Registration failed: Username '{username}' already exists.")
-        return False
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+
+        for version, name, statements in MIGRATIONS:
+            if version in applied:
+                continue
+            for statement in statements:
+                cursor.execute(statement)
+            try:
+                cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            except mysql.connector.IntegrityError:
+                # Another app instance applied it at the same time
+                pass
+            connection.commit()
+            logger.info(f"Applied migration {version}: {name}")
     except Error as e:
-        print(f"Error during registration: {e}")
-        return False
+        logger.error(f"Error applying migrations: {e}")
     finally:
         cursor.close()
+
+def purge_old_predictions(retention_days=PREDICTION_LOG_RETENTION_DAYS, batch_size=10000):
+    """
+    Deletes prediction logs older than `retention_days`, in batches so each
+    transaction stays small. Logs with unprocessed feedback are kept until the
+    retraining job has used them.
+    TiDB TTL and table partitioning cannot be combined with the foreign keys between
+    these tables, so retention is done with indexed range deletes instead. Run it
+    periodically, e.g. from cron with `python db_maintenance.py purge`.
+    Returns:
+        int: Number of deleted rows, or None if the database could not be reached.
+    """
+    if not retention_days:
+        return 0
+    deleted = 0
+    with pooled_connection() as connection:
+        if not connection:
+            return None
+        cursor = connection.cursor()
+        try:
+            while True:
+                cursor.execute("""
+                DELETE FROM prediction_logs
+                WHERE timestamp < NOW() - INTERVAL %s DAY
+                AND NOT EXISTS (
+                    SELECT 1 FROM model_feedback f WHERE f.log_id = prediction_logs.id AND f.is_processed = FALSE
+                )
+                LIMIT %s
+                """, (retention_days, batch_size))
+                connection.commit()
+                deleted += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    break
+            logger.info(f"Retention: deleted {deleted} prediction logs older than {retention_days} days.")
+            return deleted
+        except Error as e:
+            logger.error(f"Error purging old predictions: {e}")
+            return None
+        finally:
+            cursor.close()
         
-def login_user(connection, username, password):
+# User Management Functions
+def register_user(username, password, gender):
+    """Registers a new user with a securely hashed password."""
+    # Hash on the bounded bcrypt pool, before a pooled connection is taken
+    hashed_password = auth.hash_password(password)
+
+    with pooled_connection() as connection:
+        if not connection:
+            return False
+        cursor = connection.cursor()
+        try:
+            sql = "INSERT INTO users (username, password_hash, gender) VALUES (%s, %s, %s)"
+            cursor.execute(sql, (username, hashed_password, gender))
+            connection.commit()
+            logger.info(f"User '{username}' registered successfully.")
+            return True
+        except mysql.connector.IntegrityError:
+            # This error occurs if the username is already taken
+            logger.warning(f"Registration failed: Username '{username}' already exists.")
+            return False
+        except Error as e:
+            logger.error(f"Error during registration: {e}")
+            return False
+        finally:
+            cursor.close()
+
+def login_user(username, password):
     """Logs in a user by verifying their username and password hash."""
-    if not connection or not connection.is_connected():
-        return None
-    cursor = connection.cursor(dictionary=True)
-    # Fetch results as dictionaries
-    try:
-        sql = "SELECT id, username, password_hash, gender FROM users WHERE username = %s"
-        cursor.execute(sql, (username,))
-        user_record = cursor.fetchone()
-        
-        if user_record:
-            # Check if the provided password matches the stored hash
-            password_valid = bcrypt.checkpw(password.encode('utf-8'), user_record['password_hash'].encode('utf-8'))
-            if password_valid:
-                print(f"User '{username}' logged in successfully.")
-                # Return a dictionary of user details
-                return {
-                    "user_id": user_record['id'],
-                    "username": user_record['username'],
-                    "gender": user_record['gender']
-                }
-                
-        print(f"Login failed: Invalid username or password for '{username}'.")
-        return None
-    except Error as e:
-        print(f"Error during login: {e}")
-        return None
-    finally:
-        cursor.close()
-        
+    with pooled_connection() as connection:
+        if not connection:
+            return None
+        cursor = connection.cursor(dictionary=True)
+        # Fetch results as dictionaries
+        try:
+            sql = "SELECT id, username, password_hash, gender FROM users WHERE username = %s"
+            cursor.execute(sql, (username,))
+            user_record = cursor.fetchone()
+        except Error as e:
+            logger.error(f"Error during login: {e}")
+            return None
+        finally:
+            cursor.close()
+
+    # The password check runs after the connection is back in the pool
+    if user_record:
+        # Check if the provided password matches the stored hash
+        password_valid = auth.check_password(password, user_record['password_hash'])
+        if password_valid:
+            if auth.needs_rehash(user_record['password_hash']):
+                # The work factor changed since this hash was made; upgrade it now that we know the password
+                update_password_hash(user_record['id'], auth.hash_password(password))
+            logger.info(f"User '{username}' logged in successfully.")
+            # Return a dictionary of user details
+            return {
+                "user_id": user_record['id'],
+                "username": user_record['username'],
+                "gender": user_record['gender']
+            }
+
+    logger.warning(f"Login failed: Invalid username or password for '{username}'.")
+    return None
+
+def update_password_hash(user_id, password_hash):
+    """Replaces a user's stored password hash, e.g. after the bcrypt work factor changed."""
+    with pooled_connection() as connection:
+        if not connection:
+            return False
+        cursor = connection.cursor()
+        try:
+            cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s", (password_hash, user_id))
+            connection.commit()
+            return True
+        except Error as e:
+            logger.error(f"Error updating password hash: {e}")
+            return False
+        finally:
+            cursor.close()
+
 # Logging Functions
-def log_prediction(connection, session_id, prediction, confidence, user_id=None):
+def log_prediction(session_id, prediction, confidence, user_id=None, model_version=None):
     """
-    Logs a prediction. Now accepts an optional user_id logged_in users.
+    Logs a prediction synchronously. Now accepts an optional user_id logged_in users,
+    and the version of the model that made it (the column default is used when omitted).
+    The live interpreter uses `PredictionLogWriter` instead.
     """
-    if not connection or not connection.is_connected():
-        return None
-    
+    with pooled_connection() as connection:
+        if not connection:
+            return None
+        cursor = connection.cursor()
+        try:
+            sql = "INSERT INTO prediction_logs (session_id, user_id, predicted_sign, confidence_score, model_version) VALUES (%s, %s, %s, %s, COALESCE(%s, DEFAULT(model_version)))"
+            values = (session_id, user_id, prediction, confidence, model_version)
+            cursor.execute(sql, values)
+            connection.commit()
+            last_id = cursor.lastrowid
+            if _row_log_sampler():
+                logger.info(f"Log successful: Sign '{prediction}' by user_id '{user_id}'. Log ID: {last_id} "
+                            f"(1 in {LOG_SAMPLE_EVERY} logged)")
+            return last_id
+        except Error as e:
+            logger.error(f"Error logging prediction: {e}")
+            return None
+        finally:
+            cursor.close()
+
+def fetch_unprocessed_feedback(after_id=0, limit=500):
+    """
+    Fetches one page of unprocessed feedback joined to its prediction log.
+    Pages are keyset-paginated on model_feedback.id (AUTO_RANDOM ids are always
+    positive): pass the last id of the previous page as `after_id` to get the next one.
+    Returns:
+        list: Dictionaries with feedback_id, correct_sign, predicted_sign and roi_crop,
+            or None if the database could not be reached.
+    """
+    with pooled_connection() as connection:
+        if not connection:
+            return None
+        cursor = connection.cursor(dictionary=True)
+        try:
+            sql = """
+            SELECT f.id AS feedback_id, f.correct_sign, l.predicted_sign, l.roi_crop
+            FROM model_feedback f
+            JOIN prediction_logs l ON l.id = f.log_id
+            WHERE f.is_processed = FALSE AND f.id > %s
+            ORDER BY f.id
+            LIMIT %s
+            """
+            cursor.execute(sql, (after_id, limit))
+            return cursor.fetchall()
+        except Error as e:
+            logger.error(f"Error fetching feedback: {e}")
+            return None
+        finally:
+            cursor.close()
+
+def mark_feedback_processed(feedback_ids, chunk_size=1000):
+    """Marks feedback rows as processed with bulk UPDATEs of up to `chunk_size` ids each."""
+    feedback_ids = list(feedback_ids)
+    with pooled_connection() as connection:
+        if not connection:
+            return False
+        cursor = connection.cursor()
+        try:
+            for start in range(0, len(feedback_ids), chunk_size):
+                chunk = feedback_ids[start:start + chunk_size]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f"UPDATE model_feedback SET is_processed = TRUE WHERE id IN ({placeholders})", chunk)
+            connection.commit()
+            logger.info(f"Marked {len(feedback_ids)} feedback rows as processed.")
+            return True
+        except Error as e:
+            connection.rollback()
+            logger.error(f"Error marking feedback as processed: {e}")
+            return False
+        finally:
+            cursor.close()
+
+def log_feedback(log_id, correct_sign):
+    """Logs user_provided feedback for an incorrect prediction. Returns True if it was saved."""
+    with pooled_connection() as connection:
+        if not connection:
+            return False
+        cursor = connection.cursor()
+        try:
+            sql = "INSERT INTO model_feedback (log_id, correct_sign) VALUES (%s, %s)"
+            values = (log_id, correct_sign)
+            cursor.execute(sql, values)
+            connection.commit()
+            logger.info(f"Feedback successful: Log ID {log_id} corrected to '{correct_sign}'.")
+            return True
+        except Error as e:
+            logger.error(f"Error loading feedback: {e}")
+            return False
+        finally:
+            cursor.close()
+
+# Analytics rollups
+def _advance_watermark(cursor, name, sql, batch_size):
+    """
+    Locks a rollup watermark and reads the next batch of rows past it.
+    The lock is held until the caller commits, so concurrent refreshes never fold
+    the same rows twice. Rows are read in (timestamp, id) order.
+    """
+    cursor.execute("SELECT last_timestamp, last_id FROM rollup_watermarks WHERE name = %s FOR UPDATE", (name,))
+    last_timestamp, last_id = cursor.fetchone()
+    cursor.execute(sql, (last_timestamp, last_timestamp, last_id, ROLLUP_LAG_SECONDS, batch_size))
+    rows = cursor.fetchall()
+    if rows:
+        cursor.execute("UPDATE rollup_watermarks SET last_timestamp = %s, last_id = %s WHERE name = %s",
+                       (rows[-1][0], rows[-1][1], name))
+    return rows
+
+def _rollup_predictions(connection, batch_size):
     cursor = connection.cursor()
     try:
-        sql = "INSERT INTO prediction_logs (session_id, user_id, predicted_sign, confidence_score) VALUES (%s, %s, %s, %s)"
-        values = (session_id, user_id, prediction, confidence)
-        cursor.execute(sql, values)
+        rows = _advance_watermark(cursor, 'predictions', """
+        SELECT timestamp, id, COALESCE(user_id, 0), session_id, predicted_sign, confidence_score
+        FROM prediction_logs
+        WHERE (timestamp > %s OR (timestamp = %s AND id > %s))
+        AND timestamp < NOW(3) - INTERVAL %s SECOND
+        ORDER BY timestamp, id
+        LIMIT %s
+        """, batch_size)
+
+        letters, buckets, sessions = {}, {}, {}
+        for timestamp, _, user_id, session_id, sign, confidence in rows:
+            count, confidence_sum = letters.get((user_id, sign), (0, 0.0))
+            letters[(user_id, sign)] = (count + 1, confidence_sum + confidence)
+            bucket = min(int(confidence * 10), 9)
+            buckets[(user_id, bucket)] = buckets.get((user_id, bucket), 0) + 1
+            _, count, first_at, last_at = sessions.get(session_id, (user_id, 0, timestamp, timestamp))
+            sessions[session_id] = (user_id, count + 1, min(first_at, timestamp), max(last_at, timestamp))
+
+        if letters:
+            cursor.executemany("""
+            INSERT INTO user_letter_stats (user_id, letter, predictions, confidence_sum) VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE predictions = predictions + VALUES(predictions),
+                                    confidence_sum = confidence_sum + VALUES(confidence_sum)
+            """, [(user_id, sign, count, total) for (user_id, sign), (count, total) in letters.items()])
+            cursor.executemany("""
+            INSERT INTO user_confidence_histogram (user_id, bucket, predictions) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE predictions = predictions + VALUES(predictions)
+            """, [(user_id, bucket, count) for (user_id, bucket), count in buckets.items()])
+            cursor.executemany("""
+            INSERT INTO session_throughput (session_id, user_id, predictions, first_at, last_at) VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE predictions = predictions + VALUES(predictions),
+                                    first_at = LEAST(first_at, VALUES(first_at)),
+                                    last_at = GREATEST(last_at, VALUES(last_at))
+            """, [(session_id, *values) for session_id, values in sessions.items()])
         connection.commit()
-        last_id = cursor.lastrowid
-        print(f"Log successful: Sign '{prediction}' by user_id '{user_id}'. Log ID: {last_id}")
-        return last_id
-    except Error as e:
-        print(f"Error logging prediction: {e}")
-        return None
+        return len(rows)
+    except Error:
+        connection.rollback()
+        raise
     finally:
         cursor.close()
-        
-def log_feedback(connection, log_id, correct_sign):
-    """Logs user_provided feedback for an incorrect prediction"""
-    if not connection or not connection.is_connected():
-        return
+
+def _rollup_feedback(connection, batch_size):
     cursor = connection.cursor()
     try:
-        sql = "INSERT INTO model_feedback (log_id, correct_sign) VALUES (%s, %s)"
-        values = (log_id, correct_sign)
-        cursor.execute(sql, values)
-        connection.commmit()
-        print(f"Feedback successful: Log ID {log_id} corrected to '{correct_sign}'.")
-        
-    except Error as e:
-        print(F"Error loading feedback: {e}")
+        rows = _advance_watermark(cursor, 'feedback', """
+        SELECT f.timestamp, f.id, COALESCE(l.user_id, 0), l.predicted_sign, f.correct_sign
+        FROM model_feedback f
+        JOIN prediction_logs l ON l.id = f.log_id
+        WHERE (f.timestamp > %s OR (f.timestamp = %s AND f.id > %s))
+        AND f.timestamp < NOW(3) - INTERVAL %s SECOND
+        ORDER BY f.timestamp, f.id
+        LIMIT %s
+        """, batch_size)
+
+        corrections, pairs = {}, {}
+        for _, _, user_id, predicted, correct in rows:
+            if predicted == correct:
+                continue
+            corrections[(user_id, predicted)] = corrections.get((user_id, predicted), 0) + 1
+            pairs[(user_id, predicted, correct)] = pairs.get((user_id, predicted, correct), 0) + 1
+
+        if corrections:
+            cursor.executemany("""
+            INSERT INTO user_letter_stats (user_id, letter, corrections) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE corrections = corrections + VALUES(corrections)
+            """, [(user_id, letter, count) for (user_id, letter), count in corrections.items()])
+            cursor.executemany("""
+            INSERT INTO confusion_pairs (user_id, predicted_sign, correct_sign, occurrences) VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE occurrences = occurrences + VALUES(occurrences)
+            """, [(*key, count) for key, count in pairs.items()])
+        connection.commit()
+        return len(rows)
+    except Error:
+        connection.rollback()
+        raise
     finally:
-        cursor.close()
\ No newline at end of file
+        cursor.close()
+
+def refresh_rollups(batch_size=5000):
+    """
+    Folds new prediction_logs and model_feedback rows into the analytics rollup
+    tables, one batch per transaction, until both are caught up.
+    Returns:
+        int: Number of source rows processed, or None if the database could not be reached.
+    """
+    processed = 0
+    with pooled_connection() as connection:
+        if not connection:
+            return None
+        try:
+            for rollup in (_rollup_predictions, _rollup_feedback):
+                while True:
+                    count = rollup(connection, batch_size)
+                    processed += count
+                    if count < batch_size:
+                        break
+        except Error as e:
+            logger.error(f"Error refreshing analytics rollups: {e}")
+            return None
+    return processed
+
+def _query(sql, params):
+    with pooled_connection() as connection:
+        if not connection:
+            return []
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        except Error as e:
+            logger.error(f"Error reading analytics: {e}")
+            return []
+        finally:
+            cursor.close()
+
+def get_letter_accuracy(user_id):
+    """Per-letter prediction counts, corrections, accuracy and mean confidence for a user."""
+    return _query("""
+    SELECT letter, predictions, corrections,
+           1 - corrections / NULLIF(predictions, 0) AS accuracy,
+           confidence_sum / NULLIF(predictions, 0) AS avg_confidence
+    FROM user_letter_stats
+    WHERE user_id = %s
+    ORDER BY letter
+    """, (user_id,))
+
+def get_confidence_distribution(user_id):
+    """Number of a user's logged predictions per confidence decile (bucket 9 = 0.9-1.0)."""
+    return _query("""
+    SELECT bucket, predictions FROM user_confidence_histogram WHERE user_id = %s ORDER BY bucket
+    """, (user_id,))
+
+def get_session_throughput(user_id, limit=20):
+    """A user's most recent sessions with their letter count and letters per minute."""
+    return _query("""
+    SELECT session_id, predictions, first_at, last_at,
+           predictions / GREATEST(TIMESTAMPDIFF(SECOND, first_at, last_at) / 60, 1 / 60) AS letters_per_minute
+    FROM session_throughput
+    WHERE user_id = %s
+    ORDER BY last_at DESC
+    LIMIT %s
+    """, (user_id, limit))
+
+def get_confused_pairs(user_id=None, limit=10):
+    """The most frequent (predicted, correct) letter pairs, for one user or across all users."""
+    if user_id is None:
+        return _query("""
+        SELECT predicted_sign, correct_sign, SUM(occurrences) AS occurrences
+        FROM confusion_pairs
+        GROUP BY predicted_sign, correct_sign
+        ORDER BY occurrences DESC
+        LIMIT %s
+        """, (limit,))
+    return _query("""
+    SELECT predicted_sign, correct_sign, occurrences
+    FROM confusion_pairs
+    WHERE user_id = %s
+    ORDER BY occurrences DESC
+    LIMIT %s
+    """, (user_id, limit))
+
+# Write-behind prediction logging
+def generate_log_id():
+    """
+    Generates a prediction log id on the client, so a log can be referenced by
+    `log_feedback` before its row has been written. The id packs the current time in
+    milliseconds above 22 random bits and always fits in a positive BIGINT.
+    """
+    millis = int(time.time() * 1000) & ((1 << 41) - 1)
+    return (millis << 22) | random.getrandbits(22)
+
+_STOP = object()
+
+class _FlushRequest:
+    """Queued by `PredictionLogWriter.flush`; set once the rows before it are written or dropped."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.written = False
+
+class PredictionLogWriter:
+    """
+    Buffers prediction logs in a bounded queue and writes them from a background
+    thread with multi-row INSERTs, so the UI loop never waits on a TiDB round trip.
+    A batch is written once it holds `batch_size` rows or its oldest row is
+    `flush_interval` seconds old. Remaining rows are written at interpreter exit.
+    """
+
+    def __init__(self, queue_size=LOG_QUEUE_SIZE, batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log_prediction(self, session_id, prediction, confidence, user_id=None, model_version=None,
+                       roi_crop=None, timeout=0.5):
+        """
+        Queues a prediction log. Blocks for at most `timeout` seconds when the queue is full.
+        `model_version` records which model variant made the prediction, and `roi_crop`
+        (the raw bytes of the grayscale model input) lets it be retrained on.
+        Returns:
+            int: The id the row will be written with, or None if the log was dropped.
+        """
+        log_id = generate_log_id()
+        try:
+            self._queue.put((log_id, session_id, user_id, prediction, confidence, model_version, roi_crop), timeout=timeout)
+            DB_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+        except queue.Full:
+            DB_LOG_ROWS.labels("dropped").inc()
+            if _drop_log_sampler():
+                logger.warning(f"Prediction log queue is full, dropping sign '{prediction}' (1 in {LOG_SAMPLE_EVERY} logged).")
+            return None
+        return log_id
+
+    def flush(self, timeout=5.0):
+        """
+        Writes every queued row now. Call before inserting rows that reference them.
+        Returns:
+            bool: True if the rows were written within `timeout` seconds, False if the
+                queue stayed full, the write failed or it did not finish in time.
+        """
+        deadline = time.monotonic() + timeout
+        request = _FlushRequest()
+        try:
+            self._queue.put(request, timeout=timeout)
+        except queue.Full:
+            return False
+        return request.done.wait(max(0.0, deadline - time.monotonic())) and request.written
+
+    def close(self):
+        """Writes the remaining rows and stops the background thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        rows = []
+        deadline = None
+        while True:
+            timeout = None if not rows else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                # The oldest buffered row has waited flush_interval seconds
+                item = None
+
+            if item is _STOP:
+                self._write(rows)
+                return
+            if isinstance(item, _FlushRequest):
+                item.written = self._write(rows)
+                rows = []
+                item.done.set()
+                continue
+            if item is not None:
+                rows.append(item)
+                if len(rows) == 1:
+                    deadline = time.monotonic() + self.flush_interval
+            if item is None or len(rows) >= self.batch_size:
+                self._write(rows)
+                rows = []
+
+    def _write(self, rows):
+        """Inserts a batch of rows, returning False if they were dropped."""
+        DB_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+        if not rows:
+            return True
+        with DB_LOG_WRITE_SECONDS.time(), pooled_connection() as connection:
+            if not connection:
+                DB_LOG_ROWS.labels("failed").inc(len(rows))
+                logger.error(f"Error logging predictions: no database connection, dropping {len(rows)} rows.")
+                return False
+            cursor = connection.cursor()
+            try:
+                # prediction_logs.id is AUTO_RANDOM, TiDB only accepts explicit ids with this set.
+                # Pooled connections reset their session on return, so set it for every batch.
+                cursor.execute("SET @@allow_auto_random_explicit_insert = true")
+                sql = ("INSERT INTO prediction_logs (id, session_id, user_id, predicted_sign, confidence_score, model_version, roi_crop) "
+                       "VALUES (%s, %s, %s, %s, %s, COALESCE(%s, DEFAULT(model_version)), %s)")
+                cursor.executemany(sql, rows)
+                connection.commit()
+                DB_LOG_ROWS.labels("written").inc(len(rows))
+                if _row_log_sampler():
+                    logger.info(f"Log successful: wrote {len(rows)} predictions (1 in {LOG_SAMPLE_EVERY} batches logged).")
+                else:
+                    logger.debug(f"Log successful: wrote {len(rows)} predictions.")
+                return True
+            except Error as e:
+                DB_LOG_ROWS.labels("failed").inc(len(rows))
+                logger.error(f"Error logging predictions: {e}")
+                return False
+            finally:
+                cursor.close()
@@ -0,0 +1,78 @@
+"""
+Trains the landmark classifier used by the landmark recognition mode.
+
+Expects labelled clips in data/clips/<LETTER>/, the same layout as
+train_temporal.py, each clip being a video file or a folder of frames. MediaPipe
+extracts the hand keypoints of every frame, frames without a hand are skipped,
+and a small dense network is trained on the normalized keypoint vectors.
+Outputs sign_landmark_mlp.npz.
+"""
+import os
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.layers import Dense, Dropout, Input
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.utils import to_categorical
+
+from landmarks import FEATURE_SIZE, LANDMARK_MODEL_PATH, LandmarkExtractor, save_landmark_model
+from model import LABELS
+from transcribe import iter_frames
+
+CLIPS_DIR = "data/clips"
+BATCH_SIZE = 128
+
+def extract_clip(path):
+    """Returns the (frames, FEATURE_SIZE) keypoint features of every frame of a clip that shows a hand."""
+    extractor = LandmarkExtractor()
+    features = []
+    for _, _, frame in iter_frames(path):
+        vector, _ = extractor(frame)
+        if vector is not None:
+            features.append(vector.copy())
+    extractor.close()
+    return features
+
+def build_landmark_model(num_classes=len(LABELS)):
+    """Builds the dense keypoint classifier."""
+    return Sequential([
+        Input(shape=(FEATURE_SIZE,)),
+        Dense(128, activation='relu'),
+        Dropout(0.2),
+        Dense(64, activation='relu'),
+        Dense(num_classes, activation='softmax'),
+    ])
+
+if __name__ == "__main__":
+    # Extract keypoint features from the labelled clips
+    X, y = [], []
+    for label in sorted(os.listdir(CLIPS_DIR)):
+        if label.upper() not in LABELS:
+            continue
+        for clip in sorted(os.listdir(os.path.join(CLIPS_DIR, label))):
+            features = extract_clip(os.path.join(CLIPS_DIR, label, clip))
+            X.extend(features)
+            y.extend([LABELS.index(label.upper())] * len(features))
+
+    X = np.asarray(X, dtype=np.float32)
+    y = to_categorical(y, num_classes=len(LABELS))
+    print(f"Landmark training data shape: {X.shape}, Labels: {y.shape}")
+
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y.argmax(axis=1))
+
+    # Build and train the classifier
+    model = build_landmark_model()
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    model.summary()
+    model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        epochs=100,
+        batch_size=BATCH_SIZE,
+        callbacks=[EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)]
+    )
+
+    loss, acc = model.evaluate(X_val, y_val)
+    print(f"Landmark classifier validation accuracy: {acc*100:.2f}%")
+    save_landmark_model(model, LANDMARK_MODEL_PATH)
@@ -1,90 +1,206 @@
+import glob
+import os
+
 import numpy as np
 import pandas as pd
 import tensorflow as tf
-from sklearn.model_selection import train_test_split
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
-from tensorflow.keras.layers import (Conv2D, Dense, Dropout, Flatten,MaxPooling2D)
+from tensorflow.keras.layers import (Conv2D, Dense, Dropout, Flatten, MaxPooling2D, RandomRotation,
+                                     RandomTranslation, RandomZoom)
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.utils import to_categorical
-
-# Load datasets
-train_df = pd.read_csv("sign_mnist_train.csv")
-test_df = pd.read_csv("sign_mnist_test.csv")
-
-# Separate labels and features
-X_train = train_df.drop("label", axis=1).values
-y_train = train_df["label"].values
-X_test = test_df.drop("label", axis=1).values
-y_test = test_df["label"].values
-
-# Normalize pixel values
-X_train = X_train / 255.0
-X_test = X_test / 255.0
-
-# Reshape to (28, 28, 1) for CNN input
-X_train = X_train.reshape(-1, 28, 28, 1)
-X_test = X_test.reshape(-1, 28, 28, 1)
-
-# One-hot encode labels
-y_train = to_categorical(y_train, num_classes=26)
-y_test = to_categorical(y_test, num_classes=26)
-
-print(f"Training data shape: {X_train.shape}, Labels: {y_train.shape}")
-
-# Data Augmentation
-datagen = ImageDataGenerator(
-    rotation_range=10,
-    width_shift_range=0.1,
-    height_shift_range=0.1,
-    zoom_range=0.1
-)
-datagen.fit(X_train)
-
-# Build CNN model
-model = Sequential([
-    Conv2D(32, (3,3), activation='relu', input_shape=(64, 64, 3)),
-    MaxPooling2D(2,2),
-
-    Conv2D(64, (3,3), activation='relu'),
-    MaxPooling2D(2,2),
-
-    Conv2D(128, (3,3), activation='relu'),
-    MaxPooling2D(2,2),
-
-    Flatten(),
-    Dropout(0.5),
-    Dense(128, activation='relu'),
-    Dense(26, activation='softmax')
+
+from export_model import export_variants
+
+TRAIN_CSV = "sign_mnist_train.csv"
+TEST_CSV = "sign_mnist_test.csv"
+SHARD_DIR = "data/shards"
+# On-disk cache of the decoded training rows, so later epochs skip reading the shards
+CACHE_DIR = "data/cache"
+INPUT_SHAPE = (64, 64, 3)
+NUM_CLASSES = 26
+BATCH_SIZE = 32
+AUTOTUNE = tf.data.AUTOTUNE
+
+def source_key(path):
+    """Short key that changes whenever a source file is rewritten or grows (size and mtime)."""
+    stat = os.stat(path)
+    return f"{stat.st_size:x}-{int(stat.st_mtime):x}"
+
+def _remove_stale(directory, pattern, keep=()):
+    """Deletes files matching `pattern` in `directory`, except those named in `keep`."""
+    for path in glob.glob(os.path.join(directory, pattern)):
+        if os.path.basename(path) not in keep:
+            os.remove(path)
+
+def convert_csv_to_shard(csv_path, shard_dir=SHARD_DIR, chunk_size=10000):
+    """
+    Converts a sign-MNIST CSV into memory-mapped .npy files (uint8 images and labels).
+    The CSV is read in chunks, so conversion never holds the whole dataset in RAM.
+    Shards are named after the CSV's size and modification time, so they are reused
+    until the CSV changes and then rebuilt; shards of older versions are deleted.
+    Returns:
+        tuple: Paths of the images and labels .npy files.
+    """
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    key = source_key(csv_path)
+    images_path = os.path.join(shard_dir, f"{name}_{key}_images.npy")
+    labels_path = os.path.join(shard_dir, f"{name}_{key}_labels.npy")
+    if os.path.exists(images_path) and os.path.exists(labels_path):
+        return images_path, labels_path
+
+    os.makedirs(shard_dir, exist_ok=True)
+    _remove_stale(shard_dir, f"{name}_*.npy")
+    with open(csv_path) as f:
+        rows = sum(1 for _ in f) - 1
+
+    # Written under temporary names, so an interrupted conversion is never mistaken for a finished shard
+    images_tmp, labels_tmp = images_path + ".tmp", labels_path + ".tmp"
+    images = np.lib.format.open_memmap(images_tmp, mode='w+', dtype=np.uint8, shape=(rows, 28, 28, 1))
+    labels = np.lib.format.open_memmap(labels_tmp, mode='w+', dtype=np.int64, shape=(rows,))
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        end = start + len(chunk)
+        labels[start:end] = chunk["label"].values
+        images[start:end] = chunk.drop("label", axis=1).values.reshape(-1, 28, 28, 1).astype(np.uint8)
+        start = end
+    images.flush()
+    labels.flush()
+    del images, labels
+    os.replace(images_tmp, images_path)
+    os.replace(labels_tmp, labels_path)
+    print(f"Converted {csv_path} into {rows} memory-mapped rows in {shard_dir}")
+    return images_path, labels_path
+
+def cache_path(cache_dir, name, csv_path, input_shape=INPUT_SHAPE):
+    """
+    Returns the tf.data file cache prefix for a dataset, keyed on its CSV and input shape.
+    Caches of other versions are deleted, and so is a cache left unfinished by an
+    interrupted run: tf.data refuses to start while its lockfile exists, and only
+    writes the .index file once the cache is complete.
+    """
+    prefix = f"{name}_{source_key(csv_path)}_{'x'.join(map(str, input_shape))}"
+    keep = ()
+    if os.path.exists(os.path.join(cache_dir, prefix + ".index")):
+        keep = {os.path.basename(path) for path in glob.glob(os.path.join(cache_dir, prefix + ".*"))
+                if not path.endswith(".lockfile")}
+    _remove_stale(cache_dir, f"{name}_*", keep)
+    return os.path.join(cache_dir, prefix)
+
+def shard_dataset(images_path, labels_path, block_size=1024):
+    """
+    Streams (image, label) rows from a memory-mapped shard.
+    Rows are read a block at a time, so only the block in use is paged into memory.
+    """
+    images = np.load(images_path, mmap_mode='r')
+    labels = np.load(labels_path, mmap_mode='r')
+
+    def blocks():
+        for start in range(0, len(labels), block_size):
+            yield np.asarray(images[start:start + block_size]), np.asarray(labels[start:start + block_size])
+
+    dataset = tf.data.Dataset.from_generator(
+        blocks,
+        output_signature=(
+            tf.TensorSpec(shape=(None, 28, 28, 1), dtype=tf.uint8),
+            tf.TensorSpec(shape=(None,), dtype=tf.int64),
+        ),
+    )
+    return dataset.unbatch(), len(labels)
+
+def to_model_input(image, label, input_shape=INPUT_SHAPE):
+    """Normalizes a 28x28 grayscale row and resizes it to the model's real input shape."""
+    height, width, channels = input_shape
+    image = tf.image.resize(tf.cast(image, tf.float32) / 255.0, (height, width))
+    if channels == 3:
+        image = tf.image.grayscale_to_rgb(image)
+    return image, tf.one_hot(label, NUM_CLASSES)
+
+# Data Augmentation, applied to whole batches in parallel inside the input pipeline
+augmentation = Sequential([
+    RandomRotation(10 / 360),
+    RandomTranslation(0.1, 0.1),
+    RandomZoom(0.1),
 ])
 
-model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-model.summary()
-
-# Callbacks
-callbacks = [
-    EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True),
-    ModelCheckpoint('best_sign_model.h5', monitor='val_accuracy', save_best_only=True)
-]
-# Train Model
-history = model.fit(
-    datagen.flow(X_train, y_train, batch_size=32),
-    validation_data=(X_test, y_test),
-    epochs=20,
-    callbacks=callbacks
-)
-
-#Evaluate Model
-loss, acc = model.evaluate(X_test, y_test)
-print(f"Final Test Accuracy: {acc*100:.2f}%")
-
-# Save final trained model
-model.save("sign_model.h5")
-print("✅ sign_model.h5 saved successfully.")
-
-# Convert to TensorFlow Lite
-converter = tf.lite.TFLiteConverter.from_keras_model(model)
-tflite_model = converter.convert()
-with open("sign_model.tflite", "wb") as f:
-    f.write(tflite_model)
-print("sign_model.tflite saved successfully (ready for mobile/web).")
\ No newline at end of file
+def build_datasets(train_csv=TRAIN_CSV, test_csv=TEST_CSV, input_shape=INPUT_SHAPE, batch_size=BATCH_SIZE,
+                   shuffle_buffer=10000, cache_dir=CACHE_DIR):
+    """
+    Builds the streaming training and validation pipelines.
+    Returns:
+        tuple: (train_dataset, test_dataset, train_size)
+    """
+    train_ds, train_size = shard_dataset(*convert_csv_to_shard(train_csv))
+    test_ds, _ = shard_dataset(*convert_csv_to_shard(test_csv))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    train_ds = (
+        train_ds
+        # Cache the compact uint8 rows on disk, not the resized float images
+        .cache(cache_path(cache_dir, "train", train_csv, input_shape))
+        .shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+        .map(lambda image, label: to_model_input(image, label, input_shape), num_parallel_calls=AUTOTUNE)
+        .batch(batch_size)
+        .map(lambda images, labels: (augmentation(images, training=True), labels), num_parallel_calls=AUTOTUNE)
+        .prefetch(AUTOTUNE)
+    )
+    test_ds = (
+        test_ds
+        .map(lambda image, label: to_model_input(image, label, input_shape), num_parallel_calls=AUTOTUNE)
+        .batch(batch_size)
+        .cache(cache_path(cache_dir, "test", test_csv, input_shape))
+        .prefetch(AUTOTUNE)
+    )
+    return train_ds, test_ds, train_size
+
+def build_model(input_shape=INPUT_SHAPE):
+    """Builds the CNN classifier."""
+    return Sequential([
+        Conv2D(32, (3,3), activation='relu', input_shape=input_shape),
+        MaxPooling2D(2,2),
+
+        Conv2D(64, (3,3), activation='relu'),
+        MaxPooling2D(2,2),
+
+        Conv2D(128, (3,3), activation='relu'),
+        MaxPooling2D(2,2),
+
+        Flatten(),
+        Dropout(0.5),
+        Dense(128, activation='relu'),
+        Dense(NUM_CLASSES, activation='softmax')
+    ])
+
+if __name__ == "__main__":
+    # Load datasets as streaming pipelines
+    train_ds, test_ds, train_size = build_datasets()
+    print(f"Training rows: {train_size}, model input shape: {INPUT_SHAPE}")
+
+    # Build CNN model
+    model = build_model()
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    model.summary()
+
+    # Callbacks
+    callbacks = [
+        EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True),
+        ModelCheckpoint('best_sign_model.h5', monitor='val_accuracy', save_best_only=True)
+    ]
+    # Train Model
+    history = model.fit(
+        train_ds,
+        validation_data=test_ds,
+        epochs=20,
+        callbacks=callbacks
+    )
+
+    #Evaluate Model
+    loss, acc = model.evaluate(test_ds)
+    print(f"Final Test Accuracy: {acc*100:.2f}%")
+
+    # Save final trained model
+    model.save("sign_model.h5")
+    print("✅ sign_model.h5 saved successfully.")
+
+    # Convert to TensorFlow Lite: float32, float16 and int8 variants, recorded in model_registry.json
+    export_variants(model, keras_path="sign_model.h5")
+    print("sign_model.tflite and quantized variants saved successfully (ready for mobile/web).")
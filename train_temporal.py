@@ -0,0 +1,90 @@
+"""
+Trains the temporal head used by the streaming sequence mode.
+
+Expects labelled clips in data/clips/<LETTER>/, each clip being a video file or a
+folder of frames. Every frame goes through the same ROI preprocessing as the live
+interpreter and the frame CNN's embedding layer; the head is then trained on
+sliding windows of embeddings. Outputs sign_temporal_head.npz and the TFLite
+embedding model sign_embedding.tflite.
+"""
+import os
+
+import numpy as np
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.utils import to_categorical
+
+from model import LABELS, FramePreprocessor, load_sign_model
+from temporal import (EMBEDDING_MODEL_PATH, TEMPORAL_HEAD_PATH, TEMPORAL_WINDOW, build_embedding_model,
+                      build_temporal_model, save_temporal_head)
+from transcribe import iter_frames
+
+CLIPS_DIR = "data/clips"
+WINDOW_STRIDE = 4
+BATCH_SIZE = 64
+
+def embed_clip(path, embedding_model, preprocessor):
+    """Returns the (frames, embed_dim) embeddings of every frame in a clip."""
+    frames = [preprocessor(frame)[0][0].copy() for _, _, frame in iter_frames(path)]
+    if not frames:
+        return None
+    frames = np.stack(frames)
+    # Broadcast the single grayscale channel across the model's input channels
+    channels = embedding_model.input_shape[-1]
+    frames = np.repeat(frames, channels, axis=-1)
+    return embedding_model.predict(frames, batch_size=BATCH_SIZE, verbose=0)
+
+def make_windows(embeddings, window=TEMPORAL_WINDOW, stride=WINDOW_STRIDE):
+    """Cuts a clip into overlapping windows, padding short clips with their first frame."""
+    if len(embeddings) < window:
+        embeddings = np.pad(embeddings, ((window - len(embeddings), 0), (0, 0)), mode='edge')
+    return [embeddings[start:start + window] for start in range(0, len(embeddings) - window + 1, stride)]
+
+# Load the frame CNN and cut it at its embedding layer
+model = load_sign_model('sign_model.h5')
+if model is None:
+    raise SystemExit("Train the frame model with train_model.py first.")
+embedding_model = build_embedding_model(model)
+preprocessor = FramePreprocessor(target_size=tuple(embedding_model.input_shape[1:3]))
+
+# Build windowed training data from the labelled clips
+X, y = [], []
+for label in sorted(os.listdir(CLIPS_DIR)):
+    if label.upper() not in LABELS:
+        continue
+    for clip in sorted(os.listdir(os.path.join(CLIPS_DIR, label))):
+        embeddings = embed_clip(os.path.join(CLIPS_DIR, label, clip), embedding_model, preprocessor)
+        if embeddings is None:
+            continue
+        windows = make_windows(embeddings)
+        X.extend(windows)
+        y.extend([LABELS.index(label.upper())] * len(windows))
+
+X = np.asarray(X, dtype=np.float32)
+y = to_categorical(y, num_classes=len(LABELS))
+print(f"Temporal training data shape: {X.shape}, Labels: {y.shape}")
+
+X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y.argmax(axis=1))
+
+# Build and train the temporal head
+head = build_temporal_model(window=TEMPORAL_WINDOW, embed_dim=X.shape[-1], num_classes=len(LABELS))
+head.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+head.summary()
+head.fit(
+    X_train, y_train,
+    validation_data=(X_val, y_val),
+    epochs=30,
+    batch_size=BATCH_SIZE,
+    callbacks=[EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)]
+)
+
+loss, acc = head.evaluate(X_val, y_val)
+print(f"Temporal head validation accuracy: {acc*100:.2f}%")
+save_temporal_head(head, TEMPORAL_HEAD_PATH)
+
+# Export the embedding extractor for the TFLite runtime
+converter = tf.lite.TFLiteConverter.from_keras_model(embedding_model)
+with open(EMBEDDING_MODEL_PATH, "wb") as f:
+    f.write(converter.convert())
+print(f"{EMBEDDING_MODEL_PATH} saved successfully.")
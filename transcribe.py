@@ -0,0 +1,198 @@
+"""
+Headless batch transcription of recorded signing.
+
+Runs the same ROI preprocessing and model as the live interpreter over a video file
+or a folder of frames, and writes per-frame predictions plus the stabilized letter
+stream to CSV or JSONL. Decoding, preprocessing and inference run as a pipeline of
+threads so the model always has a full batch waiting.
+
+Usage:
+    python transcribe.py recording.mp4 -o predictions.csv
+    python transcribe.py frames/ -o predictions.jsonl --backend keras --batch-size 128
+"""
+import argparse
+import csv
+import json
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+from model import LABELS, FramePreprocessor, load_inference_backend
+from stabilizer import LetterStabilizer
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+_DONE = object()
+
+def iter_frames(source):
+    """
+    Yields (frame_index, timestamp_seconds, frame) from a video file or a folder of images.
+    Frames in a folder are read in filename order; their timestamp is None.
+    """
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if name.lower().endswith(IMAGE_EXTENSIONS))
+        for index, name in enumerate(names):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is None:
+                print(f"Skipping unreadable image: {name}")
+                continue
+            yield index, None, frame
+        return
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise IOError(f"Could not open video file: {source}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or None
+    index = 0
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield index, (index / fps if fps else None), frame
+            index += 1
+    finally:
+        capture.release()
+
+def _decode_stage(source, frames, errors):
+    try:
+        for item in iter_frames(source):
+            frames.put(item)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        frames.put(_DONE)
+
+def _preprocess_stage(frames, batches, batch_size, input_shape, errors):
+    """Fills float32 batch arrays shaped like the model input with model-ready frames."""
+    height, width, channels = input_shape
+    preprocessor = FramePreprocessor(target_size=(width, height))
+    try:
+        while True:
+            batch = np.empty((batch_size, height, width, channels), dtype=np.float32)
+            meta = []
+            while len(meta) < batch_size:
+                item = frames.get()
+                if item is _DONE:
+                    break
+                index, timestamp, frame = item
+                processed_img, _ = preprocessor(frame)
+                # Grayscale is broadcast across the model's channels
+                np.copyto(batch[len(meta)], processed_img[0], casting='unsafe')
+                meta.append((index, timestamp))
+            if meta:
+                batches.put((batch[:len(meta)], meta))
+            if len(meta) < batch_size:
+                return
+    except Exception as e:
+        errors.append(e)
+    finally:
+        batches.put(_DONE)
+
+class PredictionWriter:
+    """Writes per-frame rows as CSV or JSONL, chosen by the output file extension."""
+    FIELDS = ['frame', 'timestamp', 'sign', 'confidence', 'accepted']
+
+    def __init__(self, path):
+        self._file = open(path, 'w', newline='')
+        self._jsonl = path.lower().endswith(('.jsonl', '.json'))
+        if not self._jsonl:
+            self._csv = csv.DictWriter(self._file, fieldnames=self.FIELDS)
+            self._csv.writeheader()
+
+    def write(self, row):
+        if self._jsonl:
+            self._file.write(json.dumps(row) + '\n')
+        else:
+            self._csv.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+def transcribe(source, output_path, backend=None, model_path=None, batch_size=64,
+               window=5, confidence_threshold=0.90):
+    """
+    Transcribes a video file or image folder.
+    Args:
+        source (str): Path to a video file or a folder of frames.
+        output_path (str): Where to write per-frame predictions (.csv or .jsonl).
+        backend (str): Inference backend, as accepted by `load_inference_backend`.
+        model_path (str): Optional model file overriding the backend default.
+        batch_size (int): Frames per forward pass.
+        window (int): Vote window of the letter stabilizer.
+        confidence_threshold (float): Minimum confidence to accept a letter.
+    Returns:
+        str: The stabilized letter stream.
+    """
+    inference_backend = load_inference_backend(backend, model_path)
+    if inference_backend is None:
+        raise RuntimeError("Could not load the sign language model.")
+
+    # Bounded queues keep decoding from running far ahead of inference
+    frames = queue.Queue(maxsize=batch_size * 4)
+    batches = queue.Queue(maxsize=4)
+    errors = []
+    stages = [
+        threading.Thread(target=_decode_stage, args=(source, frames, errors), daemon=True),
+        threading.Thread(target=_preprocess_stage, args=(frames, batches, batch_size, tuple(inference_backend.input_shape[1:]), errors), daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+
+    stabilizer = LetterStabilizer(window=window, confidence_threshold=confidence_threshold)
+    writer = PredictionWriter(output_path)
+    letters = []
+    frame_count = 0
+    try:
+        while True:
+            item = batches.get()
+            if item is _DONE:
+                break
+            batch, meta = item
+            predictions = inference_backend.predict_batch(batch)
+            predicted_indices = np.argmax(predictions, axis=1)
+            for (index, timestamp), predicted_index, prediction in zip(meta, predicted_indices, predictions):
+                sign = LABELS[predicted_index]
+                confidence = float(prediction[predicted_index])
+                accepted = stabilizer.update(sign, confidence)
+                if accepted:
+                    letters.append(accepted)
+                writer.write({
+                    'frame': index,
+                    'timestamp': round(timestamp, 3) if timestamp is not None else None,
+                    'sign': sign,
+                    'confidence': round(confidence, 4),
+                    'accepted': accepted or '',
+                })
+            frame_count += len(meta)
+    finally:
+        writer.close()
+
+    for stage in stages:
+        stage.join()
+
+    if errors:
+        raise errors[0]
+    print(f"Transcribed {frame_count} frames from {source} into {output_path}")
+    return ''.join(letters)
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe sign language from a video file or a folder of frames.")
+    parser.add_argument('source', help="Video file or folder of images")
+    parser.add_argument('-o', '--output', default='predictions.csv', help="Per-frame output file (.csv or .jsonl)")
+    parser.add_argument('--backend', choices=['tflite', 'keras'], default=None, help="Inference backend (default: SIGN_MODEL_BACKEND)")
+    parser.add_argument('--model-path', default=None, help="Model file overriding the backend default")
+    parser.add_argument('--batch-size', type=int, default=64, help="Frames per forward pass")
+    parser.add_argument('--window', type=int, default=5, help="Vote window for stabilized letters")
+    parser.add_argument('--confidence', type=float, default=0.90, help="Minimum confidence to accept a letter")
+    args = parser.parse_args()
+
+    text = transcribe(args.source, args.output, backend=args.backend, model_path=args.model_path,
+                      batch_size=args.batch_size, window=args.window, confidence_threshold=args.confidence)
+    print(f"Letters: {text}")
+
+if __name__ == "__main__":
+    main()
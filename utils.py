@@ -1,73 +1,191 @@
-import pyttsx3
-import speech_recognition as sr
-import streamlit as st
+import os
+import queue
+import shutil
+import subprocess
+import sys
 import threading
 
+import streamlit as st
+
+from metrics import TTS_DROPPED, TTS_QUEUE_DEPTH, TTS_SPEAK_SECONDS, TTS_UTTERANCES
+
+# pyttsx3 and speech_recognition are imported on first use so that users who
+# never use voice features do not pay for loading them at startup.
+
 # Text to speech functions
-@st.cache_resource
-def init_tts_engine():
-    """
-    Initializes the pyttsx3 engine and caches it using Streamlit
-    This ensures the engine is created only once, improving performance
-    """
-    print("Initializing TTS engine...")
-    engine = pyttsx3.init()
-    return engine
+# Directory of pre-synthesized WAV files, rendered once per machine
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+# Maximum number of pending utterances; the oldest is dropped when it is full
+TTS_QUEUE_SIZE = int(os.getenv("TTS_QUEUE_SIZE", 8))
+# Letters arriving within this window of each other are spoken as one word
+TTS_COALESCE_MS = float(os.getenv("TTS_COALESCE_MS", 400))
+COMMON_WORDS = ("hello", "hi", "yes", "no", "please", "thank you", "thanks", "sorry", "help",
+                "good", "bad", "name", "water", "food", "stop", "love", "friend", "family")
+
+# Queue sentinel that stops the worker
+_STOP = object()
 
-def _speak_thread(text, engine):
+def _wav_player():
+    """Returns a function that plays a WAV file to completion, or None if no player is available."""
+    if sys.platform == "win32":
+        import winsound
+        return lambda path: winsound.PlaySound(path, winsound.SND_FILENAME)
+    for command in ("afplay", "aplay"):
+        executable = shutil.which(command)
+        if executable:
+            args = [executable] if command == "afplay" else [executable, "-q"]
+            return lambda path: subprocess.run(args + [path], check=False)
+    return None
+
+class TTSService:
     """
-    Internal function to run the blocking TTS call in a seperate thread
+    Single long-lived text-to-speech worker.
+    pyttsx3 engines are not thread-safe, so one thread owns the engine and speaks
+    utterances from a bounded queue in order. Letters and common words are rendered
+    to WAV files once, so speaking them is a cache lookup plus playback rather than
+    a synthesis call. Letters that arrive in quick succession are joined and spoken
+    as a word.
     """
-    try:
-        engine.say(text)
-        engine.runAndWait()
-    except Exception as e:
-        print(f"Error in TTS thread: {e}")
 
-def speak_text(text, engine):
+    def __init__(self, cache_dir=TTS_CACHE_DIR, queue_size=TTS_QUEUE_SIZE, coalesce_ms=TTS_COALESCE_MS):
+        self.cache_dir = cache_dir
+        self.coalesce_s = coalesce_ms / 1000
+        self._queue = queue.Queue(maxsize=queue_size)
+        # Lower-cased text -> path of its rendered WAV file
+        self._phrases = {}
+        self._play = _wav_player()
+        self._thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+        self._thread.start()
+
+    def speak(self, text):
+        """Queues text to be spoken, without blocking the caller."""
+        text = text.strip()
+        if not text:
+            return
+        while True:
+            try:
+                self._queue.put_nowait(text)
+                TTS_QUEUE_DEPTH.set(self._queue.qsize())
+                return
+            except queue.Full:
+                # Stale speech is worse than dropped speech; make room by dropping the oldest
+                try:
+                    self._queue.get_nowait()
+                    TTS_DROPPED.inc()
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        """Stops the worker after the queued utterances are spoken."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        try:
+            import pyttsx3
+            print("Initializing TTS engine...")
+            engine = pyttsx3.init()
+        except Exception as e:
+            print(f"Error initializing TTS engine: {e}")
+            return
+        self._render_phrases(engine)
+
+        pending = None
+        while True:
+            text = pending if pending is not None else self._queue.get()
+            pending = None
+            if text is _STOP:
+                return
+            if len(text) == 1:
+                # Coalesce letters signed in quick succession into a word
+                letters = [text]
+                while True:
+                    try:
+                        pending = self._queue.get(timeout=self.coalesce_s)
+                    except queue.Empty:
+                        break
+                    if pending is _STOP or len(pending) > 1:
+                        break
+                    letters.append(pending)
+                    pending = None
+                text = "".join(letters)
+            self._say(engine, text)
+
+    def _say(self, engine, text):
+        TTS_QUEUE_DEPTH.set(self._queue.qsize())
+        try:
+            path = self._phrases.get(text.lower())
+            with TTS_SPEAK_SECONDS.time():
+                if path and self._play:
+                    self._play(path)
+                    TTS_UTTERANCES.labels("cache").inc()
+                else:
+                    engine.say(text)
+                    engine.runAndWait()
+                    TTS_UTTERANCES.labels("synthesized").inc()
+        except Exception as e:
+            print(f"Error in TTS worker: {e}")
+
+    def _render_phrases(self, engine):
+        """Renders every letter and common word to a WAV file, reusing files from earlier runs."""
+        if self._play is None:
+            print("No WAV player found; speaking without the phrase cache.")
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        pending = []
+        for phrase in list("abcdefghijklmnopqrstuvwxyz") + list(COMMON_WORDS):
+            path = os.path.join(self.cache_dir, f"{phrase.replace(' ', '_')}.wav")
+            if not os.path.exists(path):
+                engine.save_to_file(phrase, path)
+                pending.append(path)
+            self._phrases[phrase] = path
+        if pending:
+            try:
+                engine.runAndWait()
+                print(f"Rendered {len(pending)} phrases to {self.cache_dir}")
+            except Exception as e:
+                print(f"Error rendering TTS phrase cache: {e}")
+        # Drop phrases the engine failed to write
+        self._phrases = {phrase: path for phrase, path in self._phrases.items() if os.path.exists(path)}
+
+@st.cache_resource
+def get_tts_service():
+    """Starts the TTS worker once per server process."""
+    return TTSService()
+
+def speak_text(text):
     """
-    Speaks the given text in non-blocking way by using a separate thread.
+    Speaks the given text in a non-blocking way through the shared TTS worker.
     The main Streamlit app will remain responsive while the text is being spoken.
 
     Args:
         text (str): The text to be spoken.
-        engine: The cached pyttsx3 engine instance.
     """
-    # To prevent issues with the engine being used by multiple threads at once
-    engine.stop()
-
-    # Create and start a new thread for the speech synthesis
-    thread = threading.Thread(target=_speak_thread, args=(text, engine))
-    thread.start()
+    get_tts_service().speak(text)
 
 # Speech to text function
-def listen_voice():
+def listen_voice(recognizer, audio_file=None):
     """
-    Listens for voice input from the microphone and returns the recognized text.
+    Streams transcripts from the microphone, or from an uploaded WAV file, as they are recognized.
     Handles common recognition errors gracefully.
-    """
-    r = sr.Recognizer()
-    with sr.Microphone() as source:
-        # Adjust for ambient noise once to improve accuracy
-        r.adjust_for_ambient_noise(source, duration=0.5)
-        st.info("Listening... please speak clearly")
-        try:
-            # The timeout and phrase_time_limit help prevent it from listening forever
-            audio = r.listen(source, timeout=5, phrase_time_limit=10)
-        except sr.WaitTimeoutError:
-            st.warning("No speech detected. Listening timed out.")
-            return None
 
+    Args:
+        recognizer: A recognizer backend from `speech.load_recognizer`.
+        audio_file: Optional 16-bit mono WAV file or file-like object to transcribe instead.
+    Yields:
+        tuple: (text, is_final) partial and final transcripts.
+    """
+    from speech import SAMPLE_RATE, SpeechRecognitionError, microphone_chunks, wav_chunks
     try:
-        st.info("Recognizing...")
-        text = r.recognize_google(audio)
-        return text
-    except sr.UnknownValueError:
-        st.warning("Sorry, Google Speech Recognition could not understand the audio.")
-        return None
-    except sr.RequestError as e:
-        st.error(f"Could not request results from Google service; {e}")
-        return None
+        if audio_file is not None:
+            sample_rate, chunks = wav_chunks(audio_file)
+        else:
+            sample_rate, chunks = SAMPLE_RATE, microphone_chunks()
+            st.info("Listening... please speak clearly")
+        yield from recognizer.stream(chunks, sample_rate)
+    except SpeechRecognitionError as e:
+        st.error(str(e))
+    except ValueError as e:
+        st.error(f"Unsupported audio file: {e}")
     except Exception as e:
         st.error(f"An unexpected error occured during speech recognition: {e}")
-        return None